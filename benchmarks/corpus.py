@@ -0,0 +1,128 @@
+import csv, random
+
+FIRST_NAMES = ['Adriana', 'Alexandre', 'Aline', 'Ana', 'Andre', 'Beatriz', 'Bruno', 'Carla', 'Carlos', 'Cristiane',
+    'Daniel', 'Eduardo', 'Fabiana', 'Fernando', 'Flavia', 'Gustavo', 'Helena', 'Jose', 'Juliana', 'Leonardo',
+    'Luciana', 'Marcelo', 'Maria', 'Paulo', 'Patricia', 'Rafael', 'Renata', 'Roberto', 'Sandra', 'Vinicius']
+LAST_NAMES = ['Almeida', 'Barcelos', 'Carvalho', 'Costa', 'Cunha', 'Ferreira', 'Gomes', 'Lima', 'Manhaes', 'Martins',
+    'Moraes', 'Oliveira', 'Pereira', 'Ribeiro', 'Rocha', 'Santos', 'Silva', 'Soares', 'Souza', 'Tavares']
+PARTICLES = ['', '', 'da ', 'de ', 'dos ']
+DEPARTMENTS = ['REITORIA', 'CAMPUS CAMPOS CENTRO', 'CAMPUS CAMPOS GUARUS', 'CAMPUS MACAÉ', 'CAMPUS CABO FRIO',
+    'CAMPUS ITAPERUNA', 'CAMPUS BOM JESUS DO ITABAPOANA', 'CAMPUS QUISSAMÃ']
+POSITIONS = ['PROFESSOR ENS BASICO TECN TECNOLOGICO (CMEBT) - 707001', 'ASSISTENTE EM ADMINISTRACAO (PCIFE) - 701200',
+    'TECNICO EM ASSUNTOS EDUCACIONAIS (PCIFE) - 701079', 'AUX EM ADMINISTRACAO (PCIFE) - 701405',
+    'CONTADOR (PCIFE) - 701015', 'ANALISTA DE TEC DA INFORMACAO (PCIFE) - 701062']
+MONTHS = ['JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO', 'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO',
+    'NOVEMBRO', 'DEZEMBRO']
+PUBLISHERS = [
+    ('REIT', 'O REITOR DO INSTITUTO FEDERAL DE EDUCAÇÃO, CIÊNCIA E TECNOLOGIA FLUMINENSE', 'REITOR'),
+    ('PROGEP', 'A PRÓ-REITORA DE GESTÃO DE PESSOAS DO INSTITUTO FEDERAL FLUMINENSE', 'PRÓ-REITORA'),
+    ('PROADM', 'O PRÓ-REITOR DE ADMINISTRAÇÃO DO INSTITUTO FEDERAL FLUMINENSE', 'PRÓ-REITOR'),
+    ('CONSUP', 'O PRESIDENTE DO CONSELHO SUPERIOR DO INSTITUTO FEDERAL FLUMINENSE', 'PRESIDENTE'),
+    ('MACAE', 'O DIRETOR GERAL DO CAMPUS MACAÉ DO INSTITUTO FEDERAL FLUMINENSE', 'DIRETOR GERAL'),
+    ('CFRIO', 'A DIRETORA GERAL DO CAMPUS CABO FRIO DO INSTITUTO FEDERAL FLUMINENSE', 'DIRETOR GERAL'),
+    ('BJESUS', 'O DIRETOR GERAL DO CAMPUS BOM JESUS DO ITABAPOANA DO INSTITUTO FEDERAL FLUMINENSE', 'DIRETOR GERAL'),
+]
+CONDITIONS = [
+    'o que consta no processo nº 23{number}.000{year}/{year}-{check},\nem tramitação nesta instituição',
+    'a necessidade de garantir a continuidade dos\nserviços administrativos',
+    'o disposto na Lei nº 8.112, de 11 de dezembro de 1990',
+    'a solicitação da chefia imediata do servidor',
+]
+ACTS = [
+    'DESIGNAR o servidor {name}, matrícula SIAPE nº {id}, para compor a comissão\nresponsável pelo acompanhamento das atividades do setor',
+    'CONCEDER licença para capacitação ao servidor {name}, matrícula SIAPE\nnº {id}, pelo período de três meses',
+    'EXONERAR, a pedido, {name}, matrícula SIAPE nº {id}, do cargo\nque ocupa neste instituto',
+    'DISPENSAR {name}, matrícula SIAPE nº {id}, da função gratificada',
+    'CONCEDER progressão por mérito profissional ao servidor {name},\nmatrícula SIAPE nº {id}',
+    'AUTORIZAR o servidor {name}, matrícula SIAPE nº {id}, a conduzir\nveículo oficial deste instituto',
+    'HOMOLOGAR a avaliação de estágio probatório de {name}, matrícula SIAPE nº {id}',
+    'DESIGNAR {name}, matrícula SIAPE nº {id}, para ocupar a função de coordenador',
+    'NOMEAR {name}, aprovado em concurso público, para o cargo efetivo',
+]
+NOISE = {'o': '0', 'l': '1', 'e': 'c', 'a': 'á', 'i': 'í', ',': '.'}
+
+def to_roman(number):
+    numerals = [(10, 'X'), (9, 'IX'), (5, 'V'), (4, 'IV'), (1, 'I')]
+    roman = ''
+    for value, numeral in numerals:
+        while number >= value:
+            roman += numeral
+            number -= value
+    return roman
+
+def generate_servants(amount=1670, seed=0):
+    generator = random.Random(seed)
+    servants = []
+    names = set()
+    while len(servants) < amount:
+        name = ' '.join((generator.choice(FIRST_NAMES), generator.choice(PARTICLES) + generator.choice(LAST_NAMES),
+            generator.choice(LAST_NAMES)))
+        if name in names:
+            name += ' ' + generator.choice(LAST_NAMES)
+        names.add(name)
+        servants.append({'ID': str(1000000 + len(servants) * 7 + generator.randrange(7)), 'NAME': name,
+            'DEPARTMENT': generator.choice(DEPARTMENTS), 'POSITION': generator.choice(POSITIONS)})
+    return servants
+
+def write_servants(path, servants):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['ID', 'NAME', 'DEPARTMENT', 'POSITION'])
+        writer.writeheader()
+        writer.writerows(servants)
+
+class CorpusGenerator:
+    def __init__(self, servants, seed=0, noise=0.005, acts=(1, 6)):
+        self.servants = servants
+        self.signers = random.Random(seed).sample(servants, min(12, len(servants)))
+        self.seed = seed
+        self.noise = noise
+        self.acts = acts
+
+    def add_noise(self, generator, text):
+        if not self.noise:
+            return text
+        return ''.join(NOISE[char] if char in NOISE and generator.random() < self.noise else char for char in text)
+
+    def get_acts(self, generator, style, amount):
+        acts = []
+        for index in range(1, amount + 1):
+            servant = generator.choice(self.servants)
+            act = generator.choice(ACTS).format(name=servant['NAME'], id=servant['ID'])
+            if style == 'article':
+                acts.append('Art. ' + str(index) + 'º ' + act + '.')
+            elif style == 'roman':
+                acts.append(to_roman(index) + ' - ' + act + ';')
+            elif style == 'decimal':
+                acts.append(str(index) + '. ' + act + ';')
+            else:
+                acts.append(act + '.')
+        if style == 'article':
+            acts.append('Art. ' + str(amount + 1) + 'º Esta Portaria entra em vigor na data de sua publicação.')
+        return acts
+
+    def generate(self, number):
+        generator = random.Random(self.seed * 1000003 + number)
+        acronym, preamble, role = generator.choice(PUBLISHERS)
+        year = generator.choice([2019, 2020, 2021])
+        day, month = generator.randint(1, 28), generator.choice(MONTHS)
+        signer = generator.choice(self.signers)['NAME']
+        lines = ['MINISTÉRIO DA EDUCAÇÃO', 'INSTITUTO FEDERAL DE EDUCAÇÃO, CIÊNCIA E TECNOLOGIA FLUMINENSE',
+            'PORTARIA N.º %d%s - %s/IFFLU, DE %d DE %s DE %d' % (number % 999 + 1, '/' + str(year) if generator.random() < 0.1 else '',
+                acronym, day, month, year), '',
+            preamble + ', no uso das atribuições que lhe confere o Estatuto,']
+        if generator.random() < 0.6:
+            lines.append('CONSIDERANDO:' if generator.random() < 0.9 else 'CONSIDER ANDO:')
+            for condition in generator.sample(CONDITIONS, generator.randint(1, len(CONDITIONS))):
+                lines.append('- ' + condition.format(number=generator.randint(100, 999), year=year, check=generator.randint(10, 99)))
+        lines.append('RESOLVE:')
+        style = generator.choice(['article', 'article', 'roman', 'decimal', 'plain'])
+        lines.extend(self.get_acts(generator, style, generator.randint(*self.acts) if style != 'plain' else 1))
+        if generator.random() < 0.3:
+            lines.extend(['', 'PORTARIA %d/%d - %s/IFFLU | Página 1 de 2' % (number % 999 + 1, year, acronym), ''])
+        lines.extend(['', signer.upper(), role, '', 'Documento assinado eletronicamente por:',
+            '■ %s, %s, em %02d/%02d/%d 10:15:00.' % (signer, role, day, MONTHS.index(month) + 1, year)])
+        return self.add_noise(generator, '\n'.join(lines) + '\n')
+
+    def generate_many(self, amount, start=1):
+        for number in range(start, start + amount):
+            yield {'id': number, 'url': 'http://cdd.iff.edu.br/portaria/%d.pdf' % number, 'content': self.generate(number)}
@@ -0,0 +1,48 @@
+import random, time
+from difflib import SequenceMatcher
+from servant import ServantRegistry
+
+def linear_match(servants, name):
+    for servant in servants:
+        if SequenceMatcher(a=name.lower(), b=servant.lower).ratio() > 0.9:
+            return servant.name
+    return None
+
+def get_issuers(registry, amount, seed=0):
+    generator = random.Random(seed)
+    signers = generator.sample(registry.servants, 20)
+    issuers = []
+    for i in range(amount):
+        name = list(generator.choice(signers).name)
+        for _ in range(generator.randint(0, 2)):
+            name[generator.randrange(len(name))] = generator.choice('aeiou ')
+        issuers.append(''.join(name))
+    return issuers
+
+def run(amount=500):
+    registry = ServantRegistry()
+    issuers = get_issuers(registry, amount)
+
+    start = time.perf_counter()
+    expected = [linear_match(registry.servants, issuer) for issuer in issuers]
+    linear = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = [registry.match(issuer) for issuer in issuers]
+    indexed = time.perf_counter() - start
+
+    memo = {}
+    start = time.perf_counter()
+    for issuer in issuers:
+        if issuer not in memo:
+            memo[issuer] = registry.match(issuer)
+    memoized = time.perf_counter() - start
+
+    assert found == expected
+    print('Issuers: %d' % amount)
+    print('Linear scan: %.3fs' % linear)
+    print('Indexed: %.3fs (%.1fx)' % (indexed, linear / indexed))
+    print('Indexed + memo: %.3fs (%.1fx)' % (memoized, linear / memoized))
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,103 @@
+import argparse, contextlib, datetime, json, os, platform, tempfile, time, tracemalloc
+import rdf_generator
+from benchmarks.corpus import CorpusGenerator, generate_servants, write_servants
+from rdf_generator import GraphOutput, ParsedOrdinance, classify_acts, get_references, normalize
+from servant import load_registry
+
+def run_normalize(ordinances):
+    for ordinance in ordinances:
+        normalize(ordinance['content'])
+    return len(ordinances)
+
+def run_field(field):
+    def run(ordinances):
+        for ordinance in ordinances:
+            getattr(ParsedOrdinance(ordinance['content']), field)
+        return len(ordinances)
+    return run
+
+def run_classify_act(ordinances, acts):
+    for items in acts:
+        classify_acts(items)
+    return sum(len(items) for items in acts)
+
+def run_get_references(ordinances, acts):
+    for items in acts:
+        for act in items:
+            get_references(act)
+    return sum(len(items) for items in acts)
+
+def run_generation(format):
+    def run(ordinances):
+        with tempfile.TemporaryDirectory() as directory:
+            output = GraphOutput(directory, format)
+            for number, position in enumerate(range(0, len(ordinances), 100), 1):
+                output.write(number, ordinances[position:position + 100])
+        return len(ordinances)
+    return run
+
+STAGES = [
+    ('normalize', run_normalize),
+    ('get_title', run_field('title')),
+    ('get_date_published', run_field('date_published')),
+    ('get_publisher', run_field('publisher')),
+    ('get_validated_issuer', run_field('validated_issuer')),
+    ('get_conditions', run_field('conditions')),
+    ('get_acts', run_field('acts')),
+    ('classify_act', run_classify_act),
+    ('get_references', run_get_references),
+    ('generate_turtle', run_generation('turtle')),
+    ('generate_ntriples', run_generation('ntriples')),
+]
+
+def measure(stage, ordinances, acts, memory=True):
+    arguments = (ordinances, acts) if stage in (run_classify_act, run_get_references) else (ordinances,)
+    rdf_generator.match_servant.cache_clear()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        items = stage(*arguments)
+        seconds = time.perf_counter() - start
+        peak = None
+        if memory:
+            rdf_generator.match_servant.cache_clear()
+            tracemalloc.start()
+            stage(*arguments)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return items, seconds, peak
+
+def run(sizes, stages=None, memory=True, seed=0, servants=1670):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'public_servants.csv')
+        write_servants(path, generate_servants(servants, seed))
+        registry = load_registry(path)
+        generator = CorpusGenerator([{'ID': s.functional_id, 'NAME': s.name} for s in registry.servants], seed)
+        for size in sizes:
+            ordinances = list(generator.generate_many(size))
+            acts = [ParsedOrdinance(o['content']).acts or [] for o in ordinances]
+            for name, stage in STAGES:
+                if stages and name not in stages:
+                    continue
+                items, seconds, peak = measure(stage, ordinances, acts, memory)
+                result = {'stage': name, 'documents': size, 'items': items, 'seconds': round(seconds, 6),
+                    'items_per_second': round(items / seconds, 2) if seconds else None, 'peak_memory_bytes': peak}
+                print('%-22s %8d docs %10.3fs %12.1f items/s %12s bytes' % (name, size, seconds,
+                    result['items_per_second'] or 0, peak if peak is not None else '-'))
+                results.append(result)
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--stages', nargs='+', choices=[name for name, _ in STAGES])
+    parser.add_argument('--servants', type=int, default=1670)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true')
+    parser.add_argument('--output', default='benchmark.json')
+    args = parser.parse_args()
+    results = run(args.sizes, args.stages, not args.no_memory, args.seed, args.servants)
+    report = {'created': datetime.datetime.now().isoformat(), 'python': platform.python_version(),
+        'platform': platform.platform(), 'servants': args.servants, 'seed': args.seed, 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,55 @@
+import argparse, json, os, statistics, subprocess, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ['rdflib', 'requests', 'bs4', 'pytesseract', 'pdf2image', 'pynput']
+
+def get_commands(directory):
+    store, database = os.path.join(directory, 'store.db'), os.path.join(directory, 'database.db')
+    return [
+        ('help', ['cli.py', '--help']),
+        ('query_type', ['cli.py', 'query', 'type', 'nomeacao', '--store', store]),
+        ('query_search', ['cli.py', 'query', 'search', 'portaria', '--database', database]),
+        ('import_downloader', ['-c', 'import downloader']),
+        ('import_rdf_generator', ['-c', 'import rdf_generator']),
+    ]
+
+def measure(arguments, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def get_heavy_imports(module):
+    code = 'import sys, ' + module + '; print(" ".join(name for name in ' + repr(HEAVY) + ' if name in sys.modules))'
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+
+def run(budget=0.15, repeat=5):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = measure(['-c', 'pass'], repeat)
+        for name, arguments in get_commands(directory):
+            seconds = measure(arguments, repeat)
+            results.append({'command': name, 'seconds': round(seconds, 4), 'over_interpreter': round(seconds - baseline, 4)})
+            print('%-22s %8.3fs %8.3fs over interpreter' % (name, seconds, seconds - baseline))
+    imports = {module: get_heavy_imports(module) for module in ('cli', 'downloader', 'store', 'ordinance')}
+    for module, heavy in imports.items():
+        print('%-22s imports %s' % (module, ', '.join(heavy) or 'nothing heavy'))
+    failed = [result['command'] for result in results if result['command'] != 'import_rdf_generator' and result['seconds'] > budget]
+    failed += [module for module, heavy in imports.items() if heavy]
+    return {'budget': budget, 'interpreter': round(baseline, 4), 'results': results, 'imports': imports, 'failed': failed}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget', type=float, default=0.15)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    report = run(args.budget, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if report['failed']:
+        print('Over budget:', ', '.join(report['failed']))
+        sys.exit(1)
@@ -0,0 +1,69 @@
+import gzip, hashlib, json, os, tempfile
+
+class DocumentCache:
+    def __init__(self, directory='cache'):
+        self.directory = directory
+
+    @staticmethod
+    def get_key(data):
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def get_parameters_key(**parameters):
+        return hashlib.sha1(json.dumps(parameters, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    def get_path(self, kind, key, *parts):
+        return os.path.join(self.directory, kind, key[:2], key, *parts)
+
+    def read(self, path):
+        try:
+            with gzip.open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, path, data, overwrite=False):
+        if not overwrite and os.path.exists(path):
+            return
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as f, gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as compressed:
+                compressed.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def put_pdf(self, data, url=None):
+        key = DocumentCache.get_key(data)
+        self.write(self.get_path('pdf', key, 'document.pdf.gz'), data)
+        if url:
+            self.write(self.get_path('url', hashlib.sha1(url.encode('utf-8')).hexdigest(), 'key.gz'), key.encode('ascii'), True)
+        return key
+
+    def get_pdf(self, key):
+        return self.read(self.get_path('pdf', key, 'document.pdf.gz'))
+
+    def get_pdf_key(self, url):
+        key = self.read(self.get_path('url', hashlib.sha1(url.encode('utf-8')).hexdigest(), 'key.gz'))
+        return key.decode('ascii') if key else None
+
+    def get_pdf_by_url(self, url):
+        key = self.get_pdf_key(url)
+        return self.get_pdf(key) if key else None
+
+    def put_page_count(self, key, pages):
+        self.write(self.get_path('pdf', key, 'pages.gz'), str(pages).encode('ascii'))
+
+    def get_page_count(self, key):
+        pages = self.read(self.get_path('pdf', key, 'pages.gz'))
+        return int(pages) if pages else None
+
+    def put_page(self, key, parameters, number, text):
+        self.write(self.get_path('pdf', key, parameters, str(number) + '.txt.gz'), text.encode('utf-8'), True)
+
+    def get_page(self, key, parameters, number):
+        text = self.read(self.get_path('pdf', key, parameters, str(number) + '.txt.gz'))
+        return text.decode('utf-8') if text is not None else None
@@ -0,0 +1,71 @@
+from automaton import Automaton
+
+class SearchTerm:
+    def __init__ (self, description, keywords):
+        self.description = description
+        self.keywords = keywords
+
+SEARCH_TERMS = [
+    SearchTerm('aceleracao_promocao', ['conceder', 'aceleração', 'promoção', 'classe']),
+    SearchTerm('adicional_insalubridade', ['conceder', 'adicional', 'insalubridade']),
+    SearchTerm('adicional_periculosidade', ['conceder', 'adicional', 'periculosidade']),
+    SearchTerm('afastamento', ['afastamento']),
+    SearchTerm('agradecimento', ['agradecer']),
+    SearchTerm('alteracao_estrutura_organizacional', ['alterar', 'parcialmente', 'estrutura', 'organizacional']),
+    SearchTerm('alteracao_jornada_trabalho', ['alterar', 'jornada', 'trabalho']),
+    SearchTerm('ambiente_organizacional', ['homologar', 'ambiente', 'organizacional']),
+    SearchTerm('autorizacao_conducao_veiculos', ['autorizar', 'veículo']),
+    SearchTerm('avaliacao_estagio_probatorio', ['homologar', 'avaliação', 'estágio', 'probatório']),
+    SearchTerm('convocacao', ['convocar', 'concurso', 'público']),
+    SearchTerm('designacao_chefia', ['designar', 'ocupar', 'função']),
+    SearchTerm('designacao_comissao', ['designar', 'comissão']),
+    SearchTerm('designacao_grupo_trabalho', ['designar', 'grupo', 'trabalho']),
+    SearchTerm('designacao_grupo_trabalho', ['instituir', 'grupo', 'trabalho']),
+    SearchTerm('designacao_fiscal_contratos', ['designar', 'fiscal', 'contrato']),
+    SearchTerm('designacao_responsavel_setor', ['designar', 'atuar', 'responsável']),
+    SearchTerm('dispensa_chefia', ['dispensar', 'função']),
+    SearchTerm('dispensa_responsavel_setor', ['dispensar', 'responsável']),
+    SearchTerm('efetivacao_lotacao', ['efetivar', 'unidade', 'administrativa']),
+    SearchTerm('exoneracao', ['exonerar']),
+    SearchTerm('horario_especial_estudante', ['horário', 'especial', 'estudante']),
+    SearchTerm('incentivo_qualificacao', ['conceder', 'incentivo', 'qualificação']),
+    SearchTerm('licenca_atividade_politica', ['conceder', 'licença', 'atividade', 'política']),
+    SearchTerm('licenca_capacitacao', ['conceder', 'licença', 'capacitação']),
+    SearchTerm('licenca_interesse_particular', ['conceder', 'licença', 'interesses', 'particulares']),
+    SearchTerm('licenca_premio', ['conceder', 'licença', 'prêmio']),
+    SearchTerm('localizacao_ambiente_atuacao', ['localizar', 'ambiente', 'atuação']),
+    SearchTerm('nomeacao', ['nomear', 'concurso', 'público']),
+    SearchTerm('progressao_capacitacao', ['conceder', 'progressão', 'capacitação']),
+    SearchTerm('progressao_desempenho', ['conceder', 'progressão', 'desempenho']),
+    SearchTerm('progressao_merito', ['conceder', 'progressão', 'mérito']),
+    SearchTerm('promocao_desempenho', ['conceder', 'promoção', 'desempenho']),
+    SearchTerm('reconhecimento_saberes_competencias', ['conceder', 'reconhecimento', 'saberes', 'competências']),
+    SearchTerm('reducao_jornada_trabalho', ['autorizar', 'alteração', 'jornada', 'trabalho']),
+    SearchTerm('nomeacao', ['remover', 'servidor']),
+    SearchTerm('retribuicao_titulacao', ['conceder', 'retribuição', 'titulação']),
+    SearchTerm('substituicao_chefia', ['designar', 'responder', 'provisoriamente', 'afastamento']),
+]
+
+class ActClassifier:
+    def __init__(self, search_terms=SEARCH_TERMS):
+        self.rules = [(frozenset(search_term.keywords), search_term.description) for search_term in search_terms]
+        keywords = {keyword for search_term in search_terms for keyword in search_term.keywords}
+        self.automaton = Automaton((keyword, keyword) for keyword in keywords)
+
+    def classify(self, act):
+        found = self.automaton.search(act.lower())
+        for keywords, description in self.rules:
+            if keywords <= found:
+                return description
+        return None
+
+    def classify_all(self, acts):
+        return [self.classify(act) for act in acts]
+
+_classifier = None
+
+def get_classifier():
+    global _classifier
+    if _classifier is None:
+        _classifier = ActClassifier()
+    return _classifier
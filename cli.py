@@ -0,0 +1,191 @@
+import argparse, os, sys
+from instrumentation import add_arguments, profiling, timer, write_summary
+
+def configure(args):
+    if args.database:
+        import ordinance
+        ordinance.DATABASE = args.database
+    if args.servants:
+        import servant
+        servant.SERVANTS = args.servants
+
+def crawl(args):
+    from cache import DocumentCache
+    from downloader import SEARCH_URL, Crawler, start_keyboard_listener
+    from frontier import CrawlState
+    if not args.no_keyboard:
+        print("Press <F1> to finish!\n\n ")
+        start_keyboard_listener()
+    cache = None if args.no_cache else DocumentCache(args.cache)
+    crawler = Crawler(args.url or SEARCH_URL, args.fetch_workers, args.ocr_workers, args.interval, args.dpi, args.page_workers, cache,
+        CrawlState(args.state), args.retries, args.backoff, args.duplicate_threshold)
+    crawler.run(args.progress_interval, args.stop_after)
+
+def ocr(args):
+    from cache import DocumentCache
+    from downloader import reextract
+    reextract(DocumentCache(args.cache), args.ocr_workers, args.batch_size, dpi=args.dpi, workers=args.page_workers)
+
+def dedup(args):
+    from cache import DocumentCache
+    from dedup import sign_ordinances
+    duplicates = sign_ordinances(DocumentCache(args.cache), args.duplicate_threshold, args.batch_size, args.link)
+    print(len(duplicates), 'near-duplicates found!')
+
+def generate(args):
+    from rdf_generator import GraphOutput, generate_graphs, index_fields, pretty_print
+    output = GraphOutput(args.output, args.format, args.compress)
+    if args.index_fields:
+        with timer('index_fields'):
+            index_fields(args.chunk_size)
+    generate_graphs(output, args.chunk_size, args.workers, args.incremental, args.progress_interval)
+    if args.pretty_print:
+        with timer('pretty_print'):
+            pretty_print(output, args.pretty_print)
+    if args.store:
+        from store import TripleStore
+        with timer('store'):
+            store = TripleStore(args.store)
+            store.load(output.get_paths())
+            store.close()
+
+def query(args):
+    if args.query == 'search':
+        from ordinance import OrdinanceDAO
+        rows = OrdinanceDAO.search(args.text, args.publisher, args.number, args.since, args.until, args.limit,
+            (args.page - 1) * args.limit, args.raw)
+        for row in rows:
+            print(str(row['id']) + '\t' + row['url'] + '\t' + ' '.join(row['snippet'].split()))
+        return
+    from store import TripleStore, get_paths
+    store = TripleStore(args.store)
+    if args.query == 'load':
+        store.load(args.paths or get_paths(args.graphs), not args.paths)
+    else:
+        if args.query == 'servant':
+            rows = store.acts_by_servant(args.name)
+        elif args.query == 'type':
+            rows = store.acts_by_type(args.type)
+        else:
+            rows = store.acts_by_publisher(args.publisher, args.since, args.until)
+        for url, act, description in rows:
+            print(url + '\t' + act + '\t' + description.replace('\n', ' '))
+        print(len(rows), 'acts found!', file=sys.stderr)
+    store.close()
+
+def export(args):
+    from export import export_fields, get_exporter
+    from ordinance import OrdinanceDAO
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    try:
+        exporter = get_exporter(args.output, args.format, args.rows_per_file)
+    except (ImportError, ValueError) as e:
+        sys.exit(str(e))
+    print(export_fields(OrdinanceDAO.iterate(args.chunk_size), exporter, args.batch_size), 'rows exported!')
+
+def serve(args):
+    from service import serve
+    serve(args.host, args.port, args.workers, args.batch_size, args.batch_window / 1000, args.queue_size)
+
+def get_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--database')
+    common.add_argument('--servants')
+    add_arguments(common)
+    ocr_options = argparse.ArgumentParser(add_help=False)
+    ocr_options.add_argument('--ocr-workers', type=int, default=None)
+    ocr_options.add_argument('--dpi', type=int, default=200)
+    ocr_options.add_argument('--page-workers', type=int, default=1)
+    ocr_options.add_argument('--cache', default='cache')
+
+    parser = argparse.ArgumentParser(prog='cli.py')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parser_crawl = commands.add_parser('crawl', parents=[common, ocr_options])
+    parser_crawl.add_argument('--url')
+    parser_crawl.add_argument('--fetch-workers', type=int, default=8)
+    parser_crawl.add_argument('--interval', type=float, default=0.1)
+    parser_crawl.add_argument('--no-cache', action='store_true')
+    parser_crawl.add_argument('--state', default='db/crawl.db')
+    parser_crawl.add_argument('--stop-after', type=int, default=20)
+    parser_crawl.add_argument('--retries', type=int, default=3)
+    parser_crawl.add_argument('--backoff', type=float, default=1.0)
+    parser_crawl.add_argument('--no-keyboard', action='store_true')
+    parser_crawl.add_argument('--duplicate-threshold', type=float, default=0.8)
+    parser_crawl.set_defaults(function=crawl, report=True)
+
+    parser_ocr = commands.add_parser('ocr', parents=[common, ocr_options])
+    parser_ocr.add_argument('--batch-size', type=int, default=100)
+    parser_ocr.set_defaults(function=ocr, report=True)
+
+    parser_dedup = commands.add_parser('dedup', parents=[common])
+    parser_dedup.add_argument('--cache', default='cache')
+    parser_dedup.add_argument('--duplicate-threshold', type=float, default=0.8)
+    parser_dedup.add_argument('--batch-size', type=int, default=100)
+    parser_dedup.add_argument('--link', action='store_true')
+    parser_dedup.set_defaults(function=dedup, report=True)
+
+    parser_generate = commands.add_parser('generate', parents=[common])
+    parser_generate.add_argument('--chunk-size', type=int, default=100)
+    parser_generate.add_argument('--workers', type=int, default=1)
+    parser_generate.add_argument('--output', default='graphs')
+    parser_generate.add_argument('--format', choices=['turtle', 'ntriples', 'nquads'], default='turtle')
+    parser_generate.add_argument('--compress', action='store_true')
+    parser_generate.add_argument('--incremental', action='store_true')
+    parser_generate.add_argument('--pretty-print', metavar='DESTINATION')
+    parser_generate.add_argument('--store', metavar='PATH')
+    parser_generate.add_argument('--index-fields', action='store_true')
+    parser_generate.set_defaults(function=generate, report=True)
+
+    parser_export = commands.add_parser('export', parents=[common])
+    parser_export.add_argument('--output', default='graphs/acts.parquet')
+    parser_export.add_argument('--format', choices=['parquet', 'arrow', 'csv'])
+    parser_export.add_argument('--batch-size', type=int, default=10000)
+    parser_export.add_argument('--chunk-size', type=int, default=100)
+    parser_export.add_argument('--rows-per-file', type=int, default=1000000)
+    parser_export.set_defaults(function=export, report=True)
+
+    parser_serve = commands.add_parser('serve', parents=[common])
+    parser_serve.add_argument('--host', default='127.0.0.1')
+    parser_serve.add_argument('--port', type=int, default=8080)
+    parser_serve.add_argument('--workers', type=int, default=None)
+    parser_serve.add_argument('--batch-size', type=int, default=16)
+    parser_serve.add_argument('--batch-window', type=float, default=5, metavar='MILLISECONDS')
+    parser_serve.add_argument('--queue-size', type=int, default=256)
+    parser_serve.set_defaults(function=serve, report=True)
+
+    store_options = argparse.ArgumentParser(add_help=False, parents=[common])
+    store_options.add_argument('--store', default='graphs/store.db')
+    parser_query = commands.add_parser('query')
+    parser_query.set_defaults(function=query, report=False)
+    queries = parser_query.add_subparsers(dest='query', required=True)
+    query_load = queries.add_parser('load', parents=[store_options])
+    query_load.add_argument('paths', nargs='*')
+    query_load.add_argument('--graphs', default='graphs')
+    queries.add_parser('servant', parents=[store_options]).add_argument('name')
+    queries.add_parser('type', parents=[store_options]).add_argument('type')
+    query_publisher = queries.add_parser('publisher', parents=[store_options])
+    query_publisher.add_argument('publisher')
+    query_publisher.add_argument('--since')
+    query_publisher.add_argument('--until')
+    query_search = queries.add_parser('search', parents=[common])
+    query_search.add_argument('text')
+    query_search.add_argument('--publisher')
+    query_search.add_argument('--number')
+    query_search.add_argument('--since')
+    query_search.add_argument('--until')
+    query_search.add_argument('--limit', type=int, default=20)
+    query_search.add_argument('--page', type=int, default=1)
+    query_search.add_argument('--raw', action='store_true')
+    return parser
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    configure(args)
+    with profiling(args.profile, args.trace_memory):
+        args.function(args)
+    if args.report or args.summary:
+        write_summary(args.summary)
+
+if __name__ == '__main__':
+    main()
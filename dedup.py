@@ -0,0 +1,112 @@
+import hashlib, re
+from array import array
+from unidecode import unidecode
+from instrumentation import stats, timed
+from ordinance import OrdinanceDAO
+
+PERMUTATIONS = 128
+BANDS = 16
+SHINGLE_SIZE = 7
+NUMBERS_OVERLAP = 0.5
+
+def get_words(text):
+    return re.findall(r'\w+', unidecode(text).lower())
+
+def get_shingles(words, size=SHINGLE_SIZE):
+    text = ' '.join(words)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+@timed('minhash')
+def get_signature(shingles):
+    hashes = [array('I', hashlib.shake_128(shingle.encode('utf-8')).digest(PERMUTATIONS * 4)) for shingle in shingles]
+    return array('I', map(min, zip(*hashes))).tobytes()
+
+def get_fingerprint(text):
+    words = get_words(text or '')
+    shingles = get_shingles(words)
+    if not shingles:
+        return None
+    numbers = ' '.join(sorted({word for word in words if word.isdigit() and len(word) > 1}))
+    return numbers, get_signature(shingles)
+
+def get_bands(signature):
+    size = len(signature) // BANDS
+    return [int.from_bytes(hashlib.blake2b(bytes([band]) + signature[band * size:(band + 1) * size], digest_size=8).digest(), 'big', signed=True)
+        for band in range(BANDS)]
+
+def get_similarity(first, second):
+    first, second = array('I', first), array('I', second)
+    return sum(x == y for (x, y) in zip(first, second)) / len(first)
+
+def get_overlap(first, second):
+    first, second = set(first.split()), set(second.split())
+    return len(first & second) / len(first | second) if first or second else 1.0
+
+class DuplicateIndex:
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+        self.pending = {}
+        self.rows = []
+
+    def find_by_hash(self, pdf_hash):
+        url = OrdinanceDAO.get_by_pdf_hash(pdf_hash)
+        if url:
+            stats.count('duplicates_by_hash')
+        return url
+
+    def find(self, fingerprint, identity):
+        if fingerprint is None or not identity or None in identity:
+            return None, 0
+        numbers, signature = fingerprint
+        bands = get_bands(signature)
+        candidates = [(row['url'], row['numbers'], row['signature'], (row['publisher'], row['number'], row['date_published']))
+            for row in OrdinanceDAO.get_candidates(bands)]
+        candidates += [candidate for band in bands for candidate in self.pending.get(band, [])]
+        stats.count('duplicate_candidates', len(candidates))
+        best = None, 0
+        for url, candidate_numbers, candidate_signature, candidate_identity in candidates:
+            if candidate_identity != identity:
+                continue
+            similarity = get_similarity(signature, candidate_signature)
+            if similarity >= self.threshold and similarity > best[1] and get_overlap(numbers, candidate_numbers) >= NUMBERS_OVERLAP:
+                best = url, similarity
+        if best[0]:
+            stats.count('duplicates_by_text')
+        return best
+
+    def add(self, url, pdf_hash, fingerprint, identity=None):
+        numbers, signature = fingerprint or (None, None)
+        bands = get_bands(signature) if signature else []
+        for band in bands:
+            self.pending.setdefault(band, []).append((url, numbers, signature, identity))
+        self.rows.append((url, pdf_hash, numbers, signature, bands))
+
+    def flush(self):
+        if self.rows:
+            OrdinanceDAO.add_signatures(self.rows)
+        self.pending, self.rows = {}, []
+
+def sign_ordinances(cache=None, threshold=0.8, batch_size=100, link=False):
+    from rdf_generator import get_indexed_fields
+    index = DuplicateIndex(threshold)
+    duplicates = []
+    for batch in OrdinanceDAO.iterate_unsigned(batch_size):
+        fields = [get_indexed_fields(row['content']) for row in batch]
+        OrdinanceDAO.update_fields([(row['id'],) + indexed for (row, indexed) in zip(batch, fields)])
+        for row, indexed in zip(batch, fields):
+            fingerprint = get_fingerprint(row['content'])
+            canonical, similarity = index.find(fingerprint, indexed[:3])
+            if canonical:
+                print(row['url'], 'is a near-duplicate of', canonical, '(%.2f)' % similarity)
+                duplicates.append((row['url'], canonical, similarity))
+                if link:
+                    continue
+            index.add(row['url'], cache.get_pdf_key(row['url']) if cache else None, fingerprint, indexed[:3])
+        stats.count('signed', len(index.rows))
+        index.flush()
+    if link and duplicates:
+        OrdinanceDAO.add_duplicates(duplicates)
+        print(OrdinanceDAO.delete_many(url for (url, _, _) in duplicates), 'duplicates linked to their canonical ordinances!')
+    return duplicates
@@ -1,31 +1,62 @@
-import requests, re, os
-import pytesseract as pt
-import pdf2image as pdf
-from bs4 import BeautifulSoup
-from pynput import keyboard
+import functools, queue, re, os, sys, threading, time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+from cache import DocumentCache
+from dedup import DuplicateIndex, get_fingerprint
+from frontier import CrawlState, Frontier
+from instrumentation import Progress, stats, timed, timer
 from ordinance import Ordinance, OrdinanceDAO
 
+SEARCH_URL = 'http://cdd.iff.edu.br/@@busca?&sort_order=reverse&portal_type:list=portaria&sort_on=Date'
+OCR_LANGUAGE = 'por'
+OCR_CONFIG = '--psm 4'
+HEADERS = {'User-Agent': 'Opera/9.80 (Windows NT 6.1; WOW64) Presto/2.12.388 Version/12.18'}
+
 def on_press(key):
+    from pynput import keyboard
     if key == keyboard.Key.f1:
         os._exit(1)
 
 def start_keyboard_listener():
+    from pynput import keyboard
     listener = keyboard.Listener(on_press=on_press)
     listener.start()
 
+def get_session(connections=10, retries=3, backoff=1.0):
+    import requests
+    session = requests.Session()
+    retry = requests.adapters.Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=connections, pool_maxsize=connections, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+_session = None
+
+def get_default_session():
+    global _session
+    if _session is None:
+        _session = get_session()
+    return _session
+
 def get_http_response(url):
-    return requests.get(url, headers = {'User-Agent': 'Opera/9.80 (Windows NT 6.1; WOW64) Presto/2.12.388 Version/12.18'})
+    return get_default_session().get(url)
+
+def parse_html(response):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(response.content, 'html.parser')
 
 def get_links(response):
-    page = BeautifulSoup(response.content, 'html.parser')
+    page = parse_html(response)
     return page.find_all('a', class_='state-published')
 
 def get_next_page(response):
-    page = BeautifulSoup(response.content, 'html.parser')
+    page = parse_html(response)
     return page.find('a', class_='proximo')
 
 def get_file_link(response):
-    page = BeautifulSoup(response.content, 'html.parser')
+    page = parse_html(response)
     return page.find(href=re.compile('pdf'))
 
 def get_ordinance(link):
@@ -35,13 +66,57 @@ def get_ordinance(link):
         ordinance.content = extract_text(response.content)
     return ordinance
 
-def extract_text(file):
+def get_page_count(file):
+    import pdf2image as pdf
+    return pdf.pdfinfo_from_bytes(file)['Pages']
+
+@timed('render')
+def render_pages(file, first_page, last_page, dpi=200, grayscale=True):
+    import pdf2image as pdf
+    return pdf.convert_from_bytes(pdf_file=file, dpi=dpi, grayscale=grayscale, first_page=first_page, last_page=last_page)
+
+@timed('ocr')
+def read_page(page):
+    import pytesseract as pt
+    return pt.image_to_string(page, lang=OCR_LANGUAGE, config=OCR_CONFIG)
+
+def read_pages(file, dpi=200, grayscale=True, workers=None):
+    workers = workers or os.cpu_count()
+    pages = get_page_count(file)
+    stats.count('pages', pages)
+    with ThreadPoolExecutor(workers) as executor:
+        for first_page in range(1, pages + 1, workers):
+            last_page = min(first_page + workers - 1, pages)
+            yield from executor.map(read_page, render_pages(file, first_page, last_page, dpi, grayscale))
+
+def read_cached_pages(file, cache, dpi=200, grayscale=True, workers=None):
+    workers = workers or os.cpu_count()
+    key = cache.put_pdf(file)
+    parameters = DocumentCache.get_parameters_key(lang=OCR_LANGUAGE, config=OCR_CONFIG, dpi=dpi, grayscale=grayscale)
+    pages = cache.get_page_count(key)
+    if pages is None:
+        pages = get_page_count(file)
+        cache.put_page_count(key, pages)
+    with ThreadPoolExecutor(workers) as executor:
+        for first_page in range(1, pages + 1, workers):
+            last_page = min(first_page + workers - 1, pages)
+            texts = [cache.get_page(key, parameters, number) for number in range(first_page, last_page + 1)]
+            missing = [index for index, text in enumerate(texts) if text is None]
+            stats.count('cached_pages', len(texts) - len(missing))
+            if missing:
+                stats.count('pages', len(missing))
+                images = render_pages(file, first_page, last_page, dpi, grayscale)
+                for index, text in zip(missing, executor.map(read_page, [images[index] for index in missing])):
+                    cache.put_page(key, parameters, first_page + index, text)
+                    texts[index] = text
+            yield from texts
+
+def extract_text(file, dpi=200, grayscale=True, workers=None, cache=None):
     start_string = 'MINISTÉRIO DA EDUCAÇÃO'
     end_string = 'Documento assinado eletronicamente por'
-    pages = pdf.convert_from_bytes(pdf_file=file)
     content = ''
-    for page in pages:
-        page_content = pt.image_to_string(page, lang='por', config='--psm 4')
+    pages = read_cached_pages(file, cache, dpi, grayscale, workers) if cache else read_pages(file, dpi, grayscale, workers)
+    for page_content in pages:
         if start_string in page_content:
             content += page_content[page_content.find(start_string):]
         else:
@@ -50,22 +125,213 @@ def extract_text(file):
             break
     return re.sub(r'\n\s*\n', '\n\n', content)
 
+def ocr_document(file, **options):
+    from rdf_generator import get_indexed_fields
+    content = extract_text(file, **options)
+    return content, get_fingerprint(content), get_indexed_fields(content), stats.collect()
+
+def reextract(cache, ocr_workers=None, batch_size=100, **options):
+    ocr = functools.partial(ocr_document, cache=cache, **options)
+    index = DuplicateIndex()
+    with ProcessPoolExecutor(ocr_workers or os.cpu_count()) as executor:
+        for batch in OrdinanceDAO.iterate_batches(batch_size):
+            ordinances, files, fields = [], [], []
+            for row in batch:
+                file = cache.get_pdf_by_url(row['url'])
+                if file is None:
+                    print('Downloading', row['url'], '- It is not cached!')
+                    response = get_default_session().get(row['url'], timeout=60)
+                    response.raise_for_status()
+                    file = response.content
+                    cache.put_pdf(file, row['url'])
+                ordinances.append(Ordinance(row['url']))
+                files.append(file)
+            for ordinance, file, (content, fingerprint, indexed, snapshot) in zip(ordinances, files, executor.map(ocr, files)):
+                ordinance.content = content
+                index.add(ordinance.url, DocumentCache.get_key(file), fingerprint)
+                fields.append((ordinance.url, indexed))
+                stats.merge(snapshot)
+            with timer('sqlite'):
+                updated = OrdinanceDAO.update_contents(ordinances)
+                OrdinanceDAO.update_fields_by_url(fields)
+                index.flush()
+            stats.count('updated', updated)
+            print(updated, 'updated on database!')
+
+class RateLimiter:
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.schedule = {}
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.schedule.get(host, now))
+            self.schedule[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+class Crawler:
+    def __init__(self, url, fetch_workers=8, ocr_workers=None, interval=0.1, dpi=200, page_workers=1, cache=None, state=None,
+            retries=3, backoff=1.0, duplicate_threshold=0.8):
+        self.url = url
+        self.fetch_workers = fetch_workers
+        self.ocr_workers = ocr_workers or os.cpu_count()
+        self.cache = cache
+        self.ocr = functools.partial(ocr_document, dpi=dpi, workers=page_workers, cache=cache)
+        self.session = get_session(fetch_workers, retries, backoff)
+        self.limiter = RateLimiter(interval)
+        self.state = state or CrawlState()
+        self.index = DuplicateIndex(duplicate_threshold) if duplicate_threshold else None
+        self.known = set()
+        self.progress = None
+
+    def get(self, url):
+        self.limiter.wait(url)
+        with timer('http'):
+            response = self.session.get(url, timeout=60)
+            response.raise_for_status()
+        stats.count('bytes', len(response.content))
+        return response
+
+    def get_walks(self):
+        for session, position in self.state.get_unfinished():
+            print('Resuming crawl #' + str(session) + ' from', position)
+            yield Frontier(self.state, session), position
+        yield Frontier(self.state, self.state.begin()), self.url
+
+    def walk(self, frontier, url, stop_after=None):
+        known = 0
+        while url:
+            index = frontier.visit(url)
+            current_page = self.get(url)
+            for link in get_links(current_page):
+                session = self.state.get_session(link['href'])
+                if session is None:
+                    known = 0
+                    yield index, link['href']
+                elif session < frontier.session:
+                    known += 1
+                    if stop_after and known >= stop_after:
+                        print('Found', known, 'known ordinances in a row, stopping!')
+                        return
+            next_page = get_next_page(current_page)
+            url = next_page['href'] if next_page else None
+
+    def download(self, frontier, index, page):
+        try:
+            file_link = get_file_link(self.get(page))
+            ordinance = Ordinance(file_link['href'])
+            if ordinance.url in self.known:
+                print('Downloading', file_link.string, '- It is already saved on database!')
+                self.state.add_pages([(page, ordinance.url, 0)])
+                frontier.done(index)
+                return None
+            file = self.cache.get_pdf_by_url(ordinance.url) if self.cache else None
+            if file is None:
+                file = self.get(ordinance.url).content
+                if self.cache:
+                    self.cache.put_pdf(file, ordinance.url)
+            pdf_hash = DocumentCache.get_key(file)
+            canonical = self.index.find_by_hash(pdf_hash) if self.index else None
+            if canonical:
+                print('Downloading', file_link.string, '- It is a copy of', canonical)
+                with timer('sqlite'):
+                    OrdinanceDAO.add_duplicates([(ordinance.url, canonical, 1.0)])
+                stats.count('duplicates')
+                self.state.add_pages([(page, ordinance.url, frontier.session)])
+                frontier.done(index)
+                return None
+        except Exception:
+            frontier.done(index)
+            raise
+        return frontier, index, page, ordinance, file_link.string, file, pdf_hash
+
+    def fetch(self, documents, stop_after=None):
+        try:
+            with ThreadPoolExecutor(self.fetch_workers) as fetchers:
+                for frontier, url in self.get_walks():
+                    pending = set()
+                    for index, page in self.walk(frontier, url, stop_after):
+                        if len(pending) >= self.fetch_workers * 2:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            self.enqueue(done, documents)
+                        frontier.add(index)
+                        pending.add(fetchers.submit(self.download, frontier, index, page))
+                    self.enqueue(pending, documents)
+                    frontier.close()
+        finally:
+            documents.put(None)
+
+    def enqueue(self, futures, documents):
+        for future in futures:
+            try:
+                document = future.result()
+            except Exception as e:
+                print('Download failed:', e)
+                continue
+            if document:
+                documents.put(document)
+
+    def store(self, futures):
+        ordinances, duplicates, pages, fields = [], [], [], []
+        for future, (frontier, index, page, ordinance, name, pdf_hash) in futures.items():
+            try:
+                ordinance.content, fingerprint, indexed, snapshot = future.result()
+                stats.merge(snapshot)
+            except Exception as e:
+                print('Downloading', name, '- OCR failed:', e)
+                continue
+            canonical, similarity = self.index.find(fingerprint, indexed[:3]) if self.index else (None, 0)
+            if canonical:
+                print('Downloading', name, '- It is a near-duplicate of', canonical, '(%.2f)' % similarity)
+                duplicates.append((ordinance.url, canonical, similarity))
+            else:
+                print('Downloading', name, '- Extracted!')
+                ordinances.append(ordinance)
+                fields.append((ordinance.url, indexed))
+                if self.index:
+                    self.index.add(ordinance.url, pdf_hash, fingerprint, indexed[:3])
+            pages.append((page, ordinance.url, frontier.session))
+        if pages:
+            with timer('sqlite'):
+                saved = OrdinanceDAO.insert_many(ordinances) if ordinances else 0
+                OrdinanceDAO.update_fields_by_url(fields)
+                if self.index:
+                    self.index.flush()
+                if duplicates:
+                    stats.count('duplicates', OrdinanceDAO.add_duplicates(duplicates))
+            stats.count('saved', saved)
+            print(saved, 'saved on database!')
+            self.state.add_pages(pages)
+        for frontier, index, *_ in futures.values():
+            frontier.done(index)
+        self.progress.update(len(futures))
+
+    def run(self, progress_interval=10, stop_after=None):
+        self.known = OrdinanceDAO.existing_urls()
+        self.progress = Progress(interval=progress_interval)
+        documents = queue.Queue(maxsize=self.ocr_workers * 2)
+        producer = threading.Thread(target=self.fetch, args=(documents, stop_after), daemon=True)
+        producer.start()
+        with ProcessPoolExecutor(self.ocr_workers) as ocr:
+            pending = {}
+            while True:
+                document = documents.get()
+                if document is None:
+                    break
+                frontier, index, page, ordinance, name, file, pdf_hash = document
+                if len(pending) >= self.ocr_workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    self.store({future: pending.pop(future) for future in done})
+                pending[ocr.submit(self.ocr, file)] = (frontier, index, page, ordinance, name, pdf_hash)
+            self.store(pending)
+        producer.join()
+        self.progress.report()
+        print('Downloads completed!')
+
 if __name__ == '__main__':
-    print("Press <F1> to finish!\n\n ")
-    start_keyboard_listener()
-    url = ('http://cdd.iff.edu.br/@@busca?&sort_order=reverse&portal_type:list=portaria&sort_on=Date')
-    while True:
-        current_page = get_http_response(url)
-        links = get_links(current_page)
-        for link in links:
-            response = get_http_response(link['href'])
-            file_link = get_file_link(response)
-            print('Downloading', file_link.string, end = '')
-            ordinance = get_ordinance(file_link)
-            OrdinanceDAO.insert(ordinance)
-        next_page = get_next_page(current_page)
-        if next_page == None:
-            print('Downloads completed!')
-            break
-        else:
-            url = next_page['href']
+    import cli
+    cli.main(['ocr' if '--reextract' in sys.argv else 'crawl'] + [argument for argument in sys.argv[1:] if argument != '--reextract'])
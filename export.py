@@ -0,0 +1,114 @@
+import csv, os
+from instrumentation import timer
+
+COLUMNS = ['ordinance_id', 'number', 'date_published', 'publisher', 'issuer', 'act_index', 'act_type', 'references']
+CATEGORIES = ['publisher', 'issuer', 'act_type']
+FORMATS = {'.parquet': 'parquet', '.arrow': 'arrow', '.arrows': 'arrow', '.csv': 'csv'}
+
+def has_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        return False
+    return True
+
+def get_schema():
+    import pyarrow as pa
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([('ordinance_id', pa.string()), ('number', pa.int32()), ('date_published', pa.date32()),
+        ('publisher', category), ('issuer', category), ('act_index', pa.int16()), ('act_type', category),
+        ('references', pa.list_(pa.string()))])
+
+class ArrowExporter:
+    def __init__(self, path, format='parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.schema = get_schema()
+        self.path = path
+        if format == 'parquet':
+            self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+        else:
+            self.writer = pa.ipc.new_stream(path, self.schema)
+        self.count = 0
+
+    def write_batch(self, rows):
+        import pyarrow as pa
+        table = pa.Table.from_pydict({column: [row[column] for row in rows] for column in COLUMNS}, schema=self.schema)
+        self.writer.write_table(table)
+        self.count += len(rows)
+
+    def close(self):
+        self.writer.close()
+
+class CsvExporter:
+    def __init__(self, path, rows_per_file=1000000):
+        self.prefix = path[:-4] if path.endswith('.csv') else path
+        self.rows_per_file = rows_per_file
+        self.codes = {column: {} for column in CATEGORIES}
+        self.paths = []
+        self.file = None
+        self.writer = None
+        self.rows = 0
+        self.count = 0
+
+    def rotate(self):
+        if self.file:
+            self.file.close()
+        self.paths.append(self.prefix + '_' + str(len(self.paths) + 1) + '.csv')
+        self.file = open(self.paths[-1], 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+        self.rows = 0
+
+    def encode(self, column, value):
+        if value is None:
+            return ''
+        codes = self.codes[column]
+        return codes.setdefault(value, len(codes))
+
+    def write_batch(self, rows):
+        for row in rows:
+            if self.file is None or self.rows >= self.rows_per_file:
+                self.rotate()
+            self.writer.writerow([self.encode(column, row[column]) if column in self.codes else
+                ' '.join(row[column]) if column == 'references' else
+                '' if row[column] is None else row[column] for column in COLUMNS])
+            self.rows += 1
+        self.count += len(rows)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+        with open(self.prefix + '_dictionary.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['column', 'code', 'value'])
+            for column, codes in self.codes.items():
+                writer.writerows((column, code, value) for (value, code) in codes.items())
+
+def get_format(path):
+    return FORMATS.get(os.path.splitext(path)[1].lower())
+
+def get_exporter(path, format=None, rows_per_file=1000000):
+    format = format or get_format(path)
+    if format is None:
+        raise ValueError('Cannot infer the export format of ' + path + ', use a .parquet, .arrow or .csv extension or --format')
+    if format == 'csv':
+        return CsvExporter(path, rows_per_file)
+    if not has_pyarrow():
+        raise ImportError('Exporting to ' + format + ' requires pyarrow, install it or export to csv')
+    return ArrowExporter(path, format)
+
+def export_fields(ordinances, exporter, batch_size=10000):
+    from rdf_generator import get_fields
+    batch = []
+    for row in get_fields(ordinances):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with timer('export'):
+                exporter.write_batch(batch)
+            batch = []
+    if batch:
+        with timer('export'):
+            exporter.write_batch(batch)
+    exporter.close()
+    return exporter.count
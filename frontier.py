@@ -0,0 +1,81 @@
+import collections, datetime, sqlite3, threading
+
+class CrawlState:
+    def __init__(self, path='db/crawl.db'):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, file_url TEXT, session INTEGER)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY AUTOINCREMENT, started TEXT, position TEXT, finished TEXT)')
+
+    def begin(self):
+        with self.lock, self.connection:
+            self.connection.execute('INSERT INTO sessions (started) VALUES (?)', (datetime.datetime.now().isoformat(),))
+            return self.connection.execute('SELECT last_insert_rowid()').fetchone()[0]
+
+    def get_unfinished(self):
+        with self.lock:
+            statement = 'SELECT id, position FROM sessions WHERE finished IS NULL AND position IS NOT NULL ORDER BY id'
+            return self.connection.execute(statement).fetchall()
+
+    def checkpoint(self, session, url):
+        with self.lock, self.connection:
+            self.connection.execute('UPDATE sessions SET position = ? WHERE id = ?', (url, session))
+
+    def finish(self, session):
+        with self.lock, self.connection:
+            self.connection.execute('UPDATE sessions SET finished = ? WHERE id = ?', (datetime.datetime.now().isoformat(), session))
+
+    def get_session(self, url):
+        with self.lock:
+            row = self.connection.execute('SELECT session FROM pages WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else None
+
+    def add_pages(self, pages):
+        with self.lock, self.connection:
+            self.connection.executemany('INSERT OR IGNORE INTO pages (url, file_url, session) VALUES (?, ?, ?)', pages)
+
+    def close(self):
+        self.connection.close()
+
+class Frontier:
+    def __init__(self, state, session):
+        self.state = state
+        self.session = session
+        self.lock = threading.Lock()
+        self.listings = []
+        self.pending = collections.Counter()
+        self.walked = False
+
+    def visit(self, url):
+        with self.lock:
+            self.listings.append(url)
+        self.update()
+        return len(self.listings) - 1
+
+    def add(self, index):
+        with self.lock:
+            self.pending[index] += 1
+
+    def done(self, index):
+        with self.lock:
+            self.pending[index] -= 1
+            if not self.pending[index]:
+                del self.pending[index]
+        self.update()
+
+    def close(self):
+        self.walked = True
+        self.update()
+
+    def update(self):
+        with self.lock:
+            if self.walked and not self.pending:
+                finished, url = True, None
+            else:
+                finished, url = False, self.listings[min(self.pending) if self.pending else -1]
+        if finished:
+            self.state.finish(self.session)
+        else:
+            self.state.checkpoint(self.session, url)
@@ -0,0 +1,127 @@
+import cProfile, contextlib, datetime, functools, json, os, threading, time, tracemalloc
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}
+        self.counters = {}
+        self.memory = None
+        self.started = time.time()
+
+    def add_time(self, name, seconds):
+        with self.lock:
+            timer = self.timers.setdefault(name, [0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.timers, self.counters = {}, {}
+
+    def collect(self):
+        with self.lock:
+            snapshot = {'timers': self.timers, 'counters': self.counters}
+            self.timers, self.counters = {}, {}
+        return snapshot
+
+    def merge(self, snapshot):
+        for name, (calls, seconds) in snapshot['timers'].items():
+            with self.lock:
+                timer = self.timers.setdefault(name, [0, 0.0])
+                timer[0] += calls
+                timer[1] += seconds
+        for name, amount in snapshot['counters'].items():
+            self.count(name, amount)
+
+    def summary(self):
+        with self.lock:
+            return {
+                'started': datetime.datetime.fromtimestamp(self.started).isoformat(),
+                'elapsed': round(time.time() - self.started, 3),
+                'timers': {name: {'calls': calls, 'seconds': round(seconds, 6)} for (name, (calls, seconds)) in sorted(self.timers.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'memory': self.memory,
+            }
+
+stats = Stats()
+os.register_at_fork(after_in_child=stats.reset)
+
+@contextlib.contextmanager
+def timer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_time(name, time.perf_counter() - start)
+
+def timed(name):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.add_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+class Progress:
+    def __init__(self, total=None, interval=10, label='documents'):
+        self.total = total
+        self.interval = interval
+        self.label = label
+        self.done = 0
+        self.started = self.reported = time.monotonic()
+
+    def update(self, amount=1):
+        self.done += amount
+        if time.monotonic() - self.reported >= self.interval:
+            self.report()
+
+    def report(self):
+        self.reported = time.monotonic()
+        elapsed = self.reported - self.started
+        rate = self.done / elapsed if elapsed else 0
+        message = 'Progress: ' + str(self.done) + ('/' + str(self.total) if self.total else '') + ' ' + self.label
+        message += ', %.1f %s/s' % (rate, self.label)
+        if self.total and rate:
+            message += ', ETA ' + str(datetime.timedelta(seconds=round((self.total - self.done) / rate)))
+        print(message)
+
+@contextlib.contextmanager
+def profiling(profile=None, trace_memory=False):
+    profiler = cProfile.Profile() if profile else None
+    if trace_memory:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile)
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+            tracemalloc.stop()
+            stats.memory = {'current': current, 'peak': peak, 'top': [str(statistic) for statistic in top]}
+
+def write_summary(path=None):
+    summary = json.dumps(stats.summary(), indent=2)
+    if path:
+        with open(path, 'w') as f:
+            f.write(summary)
+    else:
+        print(summary)
+
+def add_arguments(parser):
+    parser.add_argument('--profile', metavar='PATH')
+    parser.add_argument('--trace-memory', action='store_true')
+    parser.add_argument('--summary', metavar='PATH')
+    parser.add_argument('--progress-interval', type=float, default=10)
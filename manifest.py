@@ -0,0 +1,40 @@
+import hashlib, sqlite3
+
+class Manifest:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS shards (number INTEGER PRIMARY KEY, first_id INTEGER, last_id INTEGER, version TEXT, digest TEXT)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS ordinances (id INTEGER PRIMARY KEY, shard INTEGER, hash TEXT)')
+
+    @staticmethod
+    def get_hash(ordinance):
+        content = ordinance['url'] + '\n' + (ordinance['content'] or '')
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_digest(hashes):
+        return hashlib.sha1(''.join('%d:%s\n' % item for item in hashes).encode('utf-8')).hexdigest()
+
+    def is_current(self, number, first_id, last_id, version, digest):
+        statement = 'SELECT first_id, last_id, version, digest FROM shards WHERE number = ?'
+        row = self.connection.execute(statement, (number,)).fetchone()
+        return row == (first_id, last_id, str(version), digest)
+
+    def update(self, number, first_id, last_id, version, hashes):
+        with self.connection:
+            self.connection.execute('DELETE FROM ordinances WHERE shard = ?', (number,))
+            self.connection.executemany('INSERT OR REPLACE INTO ordinances (id, shard, hash) VALUES (?, ?, ?)',
+                ((id, number, hash) for (id, hash) in hashes))
+            self.connection.execute('INSERT OR REPLACE INTO shards (number, first_id, last_id, version, digest) VALUES (?, ?, ?, ?, ?)',
+                (number, first_id, last_id, str(version), Manifest.get_digest(hashes)))
+
+    def prune(self, last_number):
+        numbers = [row[0] for row in self.connection.execute('SELECT number FROM shards WHERE number > ?', (last_number,))]
+        with self.connection:
+            self.connection.execute('DELETE FROM ordinances WHERE shard > ?', (last_number,))
+            self.connection.execute('DELETE FROM shards WHERE number > ?', (last_number,))
+        return numbers
+
+    def close(self):
+        self.connection.close()
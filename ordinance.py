@@ -1,4 +1,6 @@
-import sqlite3
+import os, sqlite3, threading
+
+DATABASE = 'db/database.db'
 
 class Ordinance:
     def __init__(self, url, content=''):
@@ -7,43 +9,261 @@ class Ordinance:
         self.content = content
 
 class OrdinanceDAO:
+    local = threading.local()
+
+    @staticmethod
+    def connect(database=None):
+        database = database or DATABASE
+        if getattr(OrdinanceDAO.local, 'pid', None) != os.getpid():
+            OrdinanceDAO.local.pid = os.getpid()
+            OrdinanceDAO.local.connections = {}
+        connections = OrdinanceDAO.local.connections
+        if database not in connections:
+            connection = sqlite3.connect(database, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            OrdinanceDAO.create_schema(connection)
+            connections[database] = connection
+        return connections[database]
+
+    @staticmethod
+    def create_schema(connection):
+        with connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS ordinances (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT, content TEXT)')
+            connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS ordinances_url ON ordinances (url)')
+            connection.execute('CREATE TABLE IF NOT EXISTS ordinance_fields (id INTEGER PRIMARY KEY, publisher TEXT, number TEXT, date_published TEXT, version INTEGER)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ordinance_fields_publisher ON ordinance_fields (publisher, date_published)')
+            indexed = connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'ordinances_search'").fetchone()
+            connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS ordinances_search USING fts5(content, content='ordinances', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')")
+            connection.execute('CREATE TRIGGER IF NOT EXISTS ordinances_search_insert AFTER INSERT ON ordinances BEGIN '
+                'INSERT INTO ordinances_search (rowid, content) VALUES (new.id, new.content); END')
+            connection.execute('CREATE TRIGGER IF NOT EXISTS ordinances_search_delete AFTER DELETE ON ordinances BEGIN '
+                "INSERT INTO ordinances_search (ordinances_search, rowid, content) VALUES ('delete', old.id, old.content); "
+                'DELETE FROM ordinance_fields WHERE id = old.id; END')
+            connection.execute('CREATE TRIGGER IF NOT EXISTS ordinances_search_update AFTER UPDATE OF content ON ordinances BEGIN '
+                "INSERT INTO ordinances_search (ordinances_search, rowid, content) VALUES ('delete', old.id, old.content); "
+                'INSERT INTO ordinances_search (rowid, content) VALUES (new.id, new.content); '
+                'DELETE FROM ordinance_fields WHERE id = old.id; END')
+            if not indexed:
+                connection.execute("INSERT INTO ordinances_search (ordinances_search) VALUES ('rebuild')")
+            connection.execute('CREATE TABLE IF NOT EXISTS ordinance_signatures (id INTEGER PRIMARY KEY, pdf_hash TEXT, numbers TEXT, signature BLOB)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ordinance_signatures_pdf_hash ON ordinance_signatures (pdf_hash)')
+            connection.execute('CREATE TABLE IF NOT EXISTS ordinance_bands (hash INTEGER, id INTEGER, PRIMARY KEY (hash, id)) WITHOUT ROWID')
+            connection.execute('CREATE INDEX IF NOT EXISTS ordinance_bands_id ON ordinance_bands (id)')
+            connection.execute('CREATE TABLE IF NOT EXISTS ordinance_duplicates (url TEXT PRIMARY KEY, canonical INTEGER, similarity REAL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ordinance_duplicates_canonical ON ordinance_duplicates (canonical)')
+            connection.execute('CREATE TRIGGER IF NOT EXISTS ordinances_signature_delete AFTER DELETE ON ordinances BEGIN '
+                'DELETE FROM ordinance_signatures WHERE id = old.id; DELETE FROM ordinance_bands WHERE id = old.id; '
+                'DELETE FROM ordinance_duplicates WHERE canonical = old.id; END')
+            connection.execute('CREATE TRIGGER IF NOT EXISTS ordinances_signature_update AFTER UPDATE OF content ON ordinances BEGIN '
+                'UPDATE ordinance_signatures SET numbers = NULL, signature = NULL WHERE id = old.id; '
+                'DELETE FROM ordinance_bands WHERE id = old.id; END')
+
+    @staticmethod
+    def close(database=None):
+        connections = getattr(OrdinanceDAO.local, 'connections', {})
+        connection = connections.pop(database or DATABASE, None)
+        if connection:
+            connection.close()
+
     @staticmethod
     def insert(ordinance):
-        connection = sqlite3.connect('db/database.db')
-        cursor = connection.cursor()
-        if not OrdinanceDAO.exists(ordinance):
-            statement = 'INSERT INTO ordinances (url, content) VALUES (?, ?)'
-            cursor.execute(statement, (ordinance.url, ordinance.content))
-            connection.commit()
+        if OrdinanceDAO.insert_many([ordinance]):
             print(' - Saved on database!')
         else:
             print(' - It is already saved on database!')
 
+    @staticmethod
+    def insert_many(ordinances):
+        connection = OrdinanceDAO.connect()
+        statement = 'INSERT OR IGNORE INTO ordinances (url, content) VALUES (?, ?)'
+        with connection:
+            return connection.executemany(statement, ((ordinance.url, ordinance.content) for ordinance in ordinances)).rowcount
+
+    @staticmethod
+    def update_contents(ordinances):
+        connection = OrdinanceDAO.connect()
+        statement = 'UPDATE ordinances SET content = ? WHERE url = ?'
+        with connection:
+            return connection.executemany(statement, ((ordinance.content, ordinance.url) for ordinance in ordinances)).rowcount
+
+    @staticmethod
+    def update_fields(rows):
+        connection = OrdinanceDAO.connect()
+        statement = 'INSERT OR REPLACE INTO ordinance_fields (id, publisher, number, date_published, version) VALUES (?, ?, ?, ?, ?)'
+        with connection:
+            connection.executemany(statement, rows)
+
+    @staticmethod
+    def update_fields_by_url(rows):
+        connection = OrdinanceDAO.connect()
+        statement = ('INSERT OR REPLACE INTO ordinance_fields (id, publisher, number, date_published, version) '
+            'SELECT id, ?, ?, ?, ? FROM ordinances WHERE url = ?')
+        with connection:
+            connection.executemany(statement, (fields + (url,) for (url, fields) in rows))
+
+    @staticmethod
+    def iterate_unindexed(version, batch_size=100):
+        cursor = OrdinanceDAO.connect().cursor()
+        statement = ('SELECT ordinances.* FROM ordinances LEFT JOIN ordinance_fields ON ordinance_fields.id = ordinances.id '
+            'WHERE ordinances.id > ? AND (ordinance_fields.version IS NULL OR ordinance_fields.version != ?) ORDER BY ordinances.id LIMIT ?')
+        after = 0
+        while True:
+            cursor.execute(statement, (after, version, batch_size))
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            yield batch
+            after = batch[-1]['id']
+
+    @staticmethod
+    def add_signatures(rows):
+        connection = OrdinanceDAO.connect()
+        with connection:
+            connection.executemany('DELETE FROM ordinance_bands WHERE id = (SELECT id FROM ordinances WHERE url = ?)', ((row[0],) for row in rows))
+            connection.executemany('INSERT OR REPLACE INTO ordinance_signatures (id, pdf_hash, numbers, signature) '
+                'SELECT id, COALESCE(?, (SELECT pdf_hash FROM ordinance_signatures WHERE id = ordinances.id)), ?, ? FROM ordinances WHERE url = ?',
+                ((pdf_hash, numbers, signature, url) for (url, pdf_hash, numbers, signature, _) in rows))
+            connection.executemany('INSERT OR IGNORE INTO ordinance_bands (hash, id) SELECT ?, id FROM ordinances WHERE url = ?',
+                ((band, url) for (url, _, _, _, bands) in rows for band in bands))
+
+    @staticmethod
+    def add_duplicates(rows):
+        connection = OrdinanceDAO.connect()
+        statement = 'INSERT OR REPLACE INTO ordinance_duplicates (url, canonical, similarity) SELECT ?, id, ? FROM ordinances WHERE url = ?'
+        with connection:
+            return connection.executemany(statement, ((url, similarity, canonical) for (url, canonical, similarity) in rows)).rowcount
+
+    @staticmethod
+    def delete_many(urls):
+        connection = OrdinanceDAO.connect()
+        with connection:
+            return connection.executemany('DELETE FROM ordinances WHERE url = ?', ((url,) for url in urls)).rowcount
+
+    @staticmethod
+    def get_by_pdf_hash(pdf_hash):
+        cursor = OrdinanceDAO.connect().cursor()
+        statement = ('SELECT ordinances.url FROM ordinance_signatures JOIN ordinances ON ordinances.id = ordinance_signatures.id '
+            'WHERE ordinance_signatures.pdf_hash = ? LIMIT 1')
+        cursor.execute(statement, (pdf_hash,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def get_candidates(bands):
+        cursor = OrdinanceDAO.connect().cursor()
+        statement = ('SELECT ordinances.url, ordinance_signatures.numbers, ordinance_signatures.signature, ordinance_fields.publisher, '
+            'ordinance_fields.number, ordinance_fields.date_published FROM ordinance_signatures '
+            'JOIN ordinances ON ordinances.id = ordinance_signatures.id '
+            'LEFT JOIN ordinance_fields ON ordinance_fields.id = ordinances.id WHERE ordinance_signatures.id IN '
+            '(SELECT id FROM ordinance_bands WHERE hash IN (' + ', '.join('?' * len(bands)) + '))')
+        cursor.execute(statement, bands)
+        return cursor.fetchall()
+
+    @staticmethod
+    def iterate_unsigned(batch_size=100):
+        cursor = OrdinanceDAO.connect().cursor()
+        statement = ('SELECT ordinances.* FROM ordinances LEFT JOIN ordinance_signatures ON ordinance_signatures.id = ordinances.id '
+            'WHERE ordinances.id > ? AND ordinance_signatures.signature IS NULL ORDER BY ordinances.id LIMIT ?')
+        after = 0
+        while True:
+            cursor.execute(statement, (after, batch_size))
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            yield batch
+            after = batch[-1]['id']
+
+    @staticmethod
+    def get_search_query(text):
+        return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+    @staticmethod
+    def search(text, publisher=None, number=None, since=None, until=None, limit=20, offset=0, raw=False, highlight=('[', ']')):
+        cursor = OrdinanceDAO.connect().cursor()
+        statement = ('SELECT ordinances.id, ordinances.url, ordinance_fields.publisher, ordinance_fields.number, ordinance_fields.date_published, '
+            "snippet(ordinances_search, 0, ?, ?, '...', 16) AS snippet, bm25(ordinances_search) AS rank FROM ordinances_search "
+            'JOIN ordinances ON ordinances.id = ordinances_search.rowid '
+            'LEFT JOIN ordinance_fields ON ordinance_fields.id = ordinances.id WHERE ordinances_search MATCH ?')
+        parameters = [highlight[0], highlight[1], text if raw else OrdinanceDAO.get_search_query(text)]
+        for condition, value in (('ordinance_fields.publisher = ?', publisher), ('ordinance_fields.number = ?', number),
+                ('ordinance_fields.date_published >= ?', since), ('ordinance_fields.date_published <= ?', until)):
+            if value is not None:
+                statement += ' AND ' + condition
+                parameters.append(value)
+        statement += ' ORDER BY rank LIMIT ? OFFSET ?'
+        cursor.execute(statement, parameters + [limit, offset])
+        return cursor.fetchall()
+
     @staticmethod
     def get(id):
-        connection = sqlite3.connect('db/database.db')
-        connection.row_factory = sqlite3.Row
-        cursor = connection.cursor()
+        cursor = OrdinanceDAO.connect().cursor()
         statement = 'SELECT * FROM ordinances WHERE id = ?'
         cursor.execute(statement, (id,))
         return cursor.fetchall()
 
     @staticmethod
     def get_all():
-        connection = sqlite3.connect('db/database.db')
-        connection.row_factory = sqlite3.Row
-        cursor = connection.cursor()
+        cursor = OrdinanceDAO.connect().cursor()
         statement = 'SELECT * FROM ordinances'
         cursor.execute(statement)
         return cursor.fetchall()
 
+    @staticmethod
+    def get_range(first_id, last_id):
+        cursor = OrdinanceDAO.connect().cursor()
+        statement = 'SELECT * FROM ordinances WHERE id BETWEEN ? AND ? ORDER BY id'
+        cursor.execute(statement, (first_id, last_id))
+        return cursor.fetchall()
+
+    @staticmethod
+    def get_bounds(batch_size=100):
+        cursor = OrdinanceDAO.connect().cursor()
+        cursor.execute('SELECT id FROM ordinances ORDER BY id')
+        while True:
+            ids = cursor.fetchmany(batch_size)
+            if not ids:
+                break
+            yield ids[0][0], ids[-1][0], len(ids)
+
+    @staticmethod
+    def iterate_batches(batch_size=100, after=0):
+        cursor = OrdinanceDAO.connect().cursor()
+        statement = 'SELECT * FROM ordinances WHERE id > ? ORDER BY id LIMIT ?'
+        while True:
+            cursor.execute(statement, (after, batch_size))
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            yield batch
+            after = batch[-1]['id']
+
+    @staticmethod
+    def iterate(batch_size=100):
+        for batch in OrdinanceDAO.iterate_batches(batch_size):
+            yield from batch
+
+    @staticmethod
+    def count():
+        cursor = OrdinanceDAO.connect().cursor()
+        cursor.execute('SELECT COUNT(*) FROM ordinances')
+        return cursor.fetchone()[0]
+
     @staticmethod
     def exists(ordinance):
-        connection = sqlite3.connect('db/database.db')
-        cursor = connection.cursor()
-        statement = 'SELECT * FROM ordinances WHERE url = ?'
-        cursor.execute(statement, (ordinance.url,))
-        result = cursor.fetchall()
-        if result:
-            return True
-        return False
+        cursor = OrdinanceDAO.connect().cursor()
+        statement = 'SELECT 1 FROM ordinances WHERE url = ? UNION ALL SELECT 1 FROM ordinance_duplicates WHERE url = ? LIMIT 1'
+        cursor.execute(statement, (ordinance.url, ordinance.url))
+        return cursor.fetchone() is not None
+
+    @staticmethod
+    def existing_urls():
+        cursor = OrdinanceDAO.connect().cursor()
+        cursor.execute('SELECT url FROM ordinances UNION ALL SELECT url FROM ordinance_duplicates')
+        return {row[0] for row in cursor}
+
+if __name__ == '__main__':
+    import cli, sys
+    cli.main(['query', 'search'] + sys.argv[1:])
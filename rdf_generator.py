@@ -1,20 +1,21 @@
-import csv, datetime, random, re, sqlite3, sys, unidecode
-from difflib import SequenceMatcher
+import contextlib, datetime, glob, multiprocessing, os, re, sys, unidecode
+from functools import cached_property, lru_cache
+from classifier import get_classifier
+from instrumentation import Progress, stats, timed, timer
+from manifest import Manifest
 from ordinance import Ordinance, OrdinanceDAO
+from servant import get_registry
+from sink import TripleWriter, to_turtle
 from rdflib import Namespace, Graph, Literal, URIRef, BNode
 from rdflib.namespace import DCTERMS, FOAF, OWL, RDF, RDFS, SKOS, XSD
 
-class SearchTerm:
-    def __init__ (self, description, keywords):
-        self.description = description
-        self.keywords = keywords
+EXTRACTOR_VERSION = 4
 
-with open('files/public_servants.csv', newline='') as f:
-    reader = csv.DictReader(f)
-    reader = list(reader)
+ORD = Namespace('http://purl.org/ordinance-ontology/')
+SCHEMA = Namespace('http://schema.org/')
 
-def get_random_hash():
-    return '%03x' % random.getrandbits(128)
+def get_slug(text):
+    return re.sub('[^a-z0-9]+', '_', unidecode.unidecode(str(text)).lower()).strip('_')
 
 def normalize(content):
     content = content.lower()
@@ -26,284 +27,281 @@ def normalize(content):
 
     return content
 
+class Marker:
+    def __init__(self, start, prefix, end):
+        self.start = re.compile(start)
+        self.prefix = re.compile(prefix)
+        self.end = re.compile(end, re.MULTILINE)
+
+    def clean(self, line):
+        match = self.prefix.match(line)
+        return (line[match.end():] if match else line).capitalize()
+
+RESOLVE = re.compile('resolve(:)?')
+SIGNED = re.compile('documento assinado eletronicamente por')
+BULLET = re.compile('-')
+MARKERS = [
+    Marker(r'ar(t)?[\.\,]', r'ar(t)?[\.\,][^a-z]*', r'ar(t)?[\.\,].+vigor'),
+    Marker(r'\d+\.\s', r'\d+\.[^a-z]*', r'^\d+\.\s.+vigor'),
+    Marker(r'[\|ilvx]+[-\—\s\.]', r'[\|ilvx]+[-\—\s\.][^a-z]*', r'[\|ilvx]+[-\—\s\.]+.+vigor'),
+]
+
+def clean_bullet(line):
+    return line[1:].strip().capitalize()
+
+def segment(lines, marker, clean):
+    item = None
+    for line in lines:
+        if marker.match(line):
+            if item:
+                yield ' '.join(item)
+            item = [clean(line)]
+        elif item:
+            item.append(line)
+    if item:
+        yield ' '.join(item)
+
+class ParsedOrdinance:
+    def __init__(self, content):
+        self.raw = content
+
+    @cached_property
+    @timed('normalize')
+    def content(self):
+        return normalize(self.raw)
+
+    @cached_property
+    def lines(self):
+        return self.content.splitlines()
+
+    @cached_property
+    def resolve(self):
+        return self.content.find('resolve')
+
+    @cached_property
+    def considering(self):
+        return self.content.find('considerando')
+
+    @cached_property
+    def signed(self):
+        return self.content.find('documento assinado eletronicamente')
+
+    @cached_property
+    def preamble(self):
+        content = self.content
+        if self.resolve >= 0:
+            content = content[:self.resolve].replace('\n', ' ')
+        if self.considering >= 0 and (self.resolve < 0 or self.considering < self.resolve):
+            content = content[:self.considering].replace('\n', ' ')
+        return content
+
+    @cached_property
+    @timed('get_title')
+    def title(self):
+        title = self.lines[0]
+        return re.sub('\s+', ' ', re.sub('[,]', ' ', re.sub('[.\']', '', title)))
+
+    @cached_property
+    @timed('get_number')
+    def number(self):
+        try:
+            return int(re.search('\d+', self.title).group())
+        except AttributeError:
+            return None
+
+    @cached_property
+    @timed('get_date_published')
+    def date_published(self):
+        title = self.title
+        months = {1:'jan', 2:'fev', 3:'mar', 4:'abr', 5:'mai', 6:'jun', 7:'jul', 8:'ago', 9:'set', 10:'out', 11:'nov', 12:'dez'}
+        number = str(self.number)
+        try:
+            date = title[title.find(number) + len(number):].strip()
+            day = int(re.search('\d+', date).group())
+            month = [k for (k,v) in months.items() if v in date][0]
+            year = int(re.findall('\d+', date)[1])
+            return datetime.datetime(year, month, day).date()
+        except:
+            return None
+
+    @cached_property
+    @timed('get_description')
+    def description(self):
+        try:
+            date = self.date_published
+            months = {
+                1:'janeiro', 2:'fevereiro', 3:'março', 4:'abril',
+                5:'maio', 6:'junho', 7:'julho', 8:'agosto',
+                9:'setembro', 10:'outubro', 11:'novembro', 12:'dezembro'}
+            return ' '.join(('Portaria nº', str(self.number), 'de',date.strftime('%d'),
+                'de', months[int(date.strftime('%m'))], 'de', date.strftime('%Y')))
+        except:
+            return None
+
+    @cached_property
+    @timed('get_publisher')
+    def publisher(self):
+        organizations = {
+            'pró-reitor de administração': 'proadm',
+            'pró-reitora de administração': 'proadm',
+            'pró-reitor de gestão de pessoas': 'progep',
+            'pró-reitora de gestão de pessoas': 'progep',
+            'diretor do centro de referência': 'cref',
+            'presidente do conselho superior': 'consup',
+            'reitor': 'reitoria',
+            'bom jesus': 'campus_bom_jesus',
+            'cabo frio': 'campus_cabo_frio',
+            'cambuci': 'campus_cambuci',
+            'campos centro':'campus_centro',
+            'campos guarus': 'campus_guarus',
+            'itaperuna': 'campus_itaperuna',
+            'macaé': 'campus_macae',
+            'maricá': 'campus_marica',
+            'quissamã': 'campus_quissama',
+            'santo antônio de pádua': 'campus_padua',
+            'são joão da barra': 'campus_sao_joao'
+        }
+        for organization in organizations:
+            if organization in self.preamble:
+                return organizations[organization]
+        return 'iff'
+
+    @cached_property
+    @timed('get_function')
+    def function(self):
+        functions = {
+            'presidente do conselho superior': 'council_president',
+            'o pró-reitor': 'pro_rector',
+            'pró-reitora': 'pro_rector',
+            'reitor': 'rector',
+            'diretor': 'general_director',
+            'diretora': 'general_director'
+        }
+        for function in functions:
+            if function in self.preamble:
+                return functions[function]
+        return None
+
+    @cached_property
+    @timed('get_issuer')
+    def issuer(self):
+        try:
+            content = self.content
+            issuers = ('reitor', 'diretor', 'presidente')
+            issuer = None
+            if self.signed >= 0:
+                content = content[self.signed:].splitlines()[1].strip()
+                for i in issuers:
+                    if i in content:
+                        issuer = re.sub('\W', ' ', content[1:content.find(',')]).strip().title()
+            else:
+                content = list(filter(None, self.lines))
+                for i in issuers:
+                    if i in content[len(content) - 1]:
+                        issuer = content[len(content) - 2].strip().title()
+            return issuer
+        except:
+            return None
+
+    @cached_property
+    @timed('get_validated_issuer')
+    def validated_issuer(self):
+        return match_servant(self.issuer)
+
+    @cached_property
+    @timed('get_conditions')
+    def conditions(self):
+        content = self.content.replace('consider ando', 'considerando')
+        term1 = 'considerando:'
+        term2 = 'resolve'
+        start = content.find(term1)
+        end = content.find(term2)
+        if start >= 0 and end >= 0:
+            if start < end:
+                content = content[start + len(term1):end].strip()
+                if not content.startswith('-'):
+                    return [content.replace('\n', ' ')]
+                return list(segment(content.split('\n'), BULLET, clean_bullet))
+        return None
+
+    @cached_property
+    @timed('get_acts')
+    def acts(self):
+        issuer = self.issuer
+        content = self.content
+        resolve = RESOLVE.search(content)
+        if resolve:
+            content = content[resolve.end():].strip()
+            signed = SIGNED.search(content)
+            marker = next((marker for marker in MARKERS if marker.start.match(content)), None)
+            end = marker.end.search(content) if marker else None
+            if end:
+                content = content[:end.start()].strip()
+            elif issuer:
+                if signed:
+                    content = content[:signed.start()].strip()
+                content = content[:unidecode.unidecode(content).rfind(unidecode.unidecode(issuer.lower()))].strip()
+            if not marker:
+                return [content.replace('\n', ' ').strip().capitalize()]
+            return list(segment(content.split('\n'), marker.start, marker.clean))
+        return None
+
+@lru_cache(maxsize=32)
+def parse(content):
+    return ParsedOrdinance(content)
+
 def get_title(content):
-    content = normalize(content)
-    title = content.splitlines()[0]
-    title = re.sub('\s+', ' ', re.sub('[,]', ' ', re.sub('[.\']', '', title)))
-    return title
+    return parse(content).title
 
 def get_number(content):
-    title = get_title(content)
-    try:
-        return int(re.search('\d+', title).group())
-    except AttributeError:
-        return None
+    return parse(content).number
 
 def get_date_published(content):
-    title = get_title(content)
-    months = {1:'jan', 2:'fev', 3:'mar', 4:'abr', 5:'mai', 6:'jun', 7:'jul', 8:'ago', 9:'set', 10:'out', 11:'nov', 12:'dez'}
-    number = str(get_number(title))
-    try:
-        date = title[title.find(number) + len(number):].strip()
-        day = int(re.search('\d+', date).group())
-        month = [k for (k,v) in months.items() if v in date][0]
-        year = int(re.findall('\d+', date)[1])
-        return datetime.datetime(year, month, day).date()
-    except:
-        return None
+    return parse(content).date_published
 
 def get_description(content):
-    try:
-        date = get_date_published(content)
-        months = {
-            1:'janeiro', 2:'fevereiro', 3:'março', 4:'abril',
-            5:'maio', 6:'junho', 7:'julho', 8:'agosto',
-            9:'setembro', 10:'outubro', 11:'novembro', 12:'dezembro'}
-        return ' '.join(('Portaria nº', str(get_number(content)), 'de',date.strftime('%d'),
-            'de', months[int(date.strftime('%m'))], 'de', date.strftime('%Y')))
-    except:
-        return None
+    return parse(content).description
 
 def get_publisher(content):
-    organizations = {
-        'pró-reitor de administração': 'proadm',
-        'pró-reitora de administração': 'proadm',
-        'pró-reitor de gestão de pessoas': 'progep',
-        'pró-reitora de gestão de pessoas': 'progep',
-        'diretor do centro de referência': 'cref',
-        'presidente do conselho superior': 'consup',
-        'reitor': 'reitoria',
-        'bom jesus': 'campus_bom_jesus',
-        'cabo frio': 'campus_cabo_frio',
-        'cambuci': 'campus_cambuci',
-        'campos centro':'campus_centro',
-        'campos guarus': 'campus_guarus',
-        'itaperuna': 'campus_itaperuna',
-        'macaé': 'campus_macae',
-        'maricá': 'campus_marica',
-        'quissamã': 'campus_quissama',
-        'santo antônio de pádua': 'campus_padua',
-        'são joão da barra': 'campus_sao_joao'
-    }
-    content = normalize(content)
-    if 'resolve' in content:
-        content = content[:content.find('resolve')].replace('\n', ' ')
-    if 'considerando' in content:
-        content = content[:content.find('considerando')].replace('\n', ' ')
-    for organization in organizations:
-        if organization in content:
-            return organizations[organization]
-    return 'iff'
+    return parse(content).publisher
 
 def get_function(content):
-    functions = {
-        'presidente do conselho superior': 'council_president',
-        'o pró-reitor': 'pro_rector',
-        'pró-reitora': 'pro_rector',
-        'reitor': 'rector',
-        'diretor': 'general_director',
-        'diretora': 'general_director'
-    }
-    content = normalize(content)
-    if 'resolve' in content:
-        content = content[:content.find('resolve')].replace('\n', ' ')
-    if 'considerando' in content:
-        content = content[:content.find('considerando')].replace('\n', ' ')
-    for function in functions:
-        if function in content:
-            return functions[function]
-    return None
+    return parse(content).function
 
 def get_issuer(content):
-    try:
-        content = normalize(content)
-        term = 'documento assinado eletronicamente'
-        issuers = ('reitor', 'diretor', 'presidente')
-        issuer = None
-        if term in content:
-            content = content[content.find(term):].splitlines()[1].strip()
-            for i in issuers:
-                if i in content:
-                    issuer = re.sub('\W', ' ', content[1:content.find(',')]).strip().title()
-        else:
-            content = content.splitlines()
-            content = list(filter(None, content))
-            for i in issuers:
-                if i in content[len(content) - 1]:
-                    issuer = content[len(content) - 2].strip().title()
-        return issuer
-    except:
-        return None
+    return parse(content).issuer
 
 def get_validated_issuer(content):
-    issuer = get_issuer(content)
-    if issuer:
-        for row in reader:
-            if SequenceMatcher(a=issuer.lower(),b=dict(row)['NAME'].lower()).ratio() > 0.9:
-                return dict(row)['NAME']
+    return parse(content).validated_issuer
+
+@lru_cache(maxsize=4096)
+def match_servant(name):
+    if name:
+        return get_registry().match(name)
     return None
 
 def get_functional_id(name):
-    for row in reader:
-        if name == dict(row)['NAME']:
-            return dict(row)['ID']
-    return None
+    return get_registry().get_functional_id(name)
 
 def get_position(name):
-    for row in reader:
-        if name == dict(row)['NAME']:
-            return re.search('[\w ]+', dict(row)['POSITION']).group().strip()
-    return None
+    return get_registry().get_position(name)
 
 def get_conditions(content):
-    content = normalize(content)
-    content = content.replace('consider ando', 'considerando')
-    term1 = 'considerando:'
-    term2 = 'resolve'
-    if term1 in content and term2 in content:
-        if content.find(term1) < content.find(term2):
-            content = content[content.find(term1) + len(term1):content.find(term2)].strip()
-            if not content.startswith('-'):
-                return content.replace('\n', ' ')
-            content = content.splitlines()
-            index = 0
-            for line in content[:]:
-                if not line.startswith('-'):
-                    content[index - 1] += ' ' + line
-                    del content[index]
-                else:
-                    content[index] = line.replace('-', '', 1).strip().capitalize()
-                    index += 1
-            return content
-    return None
+    return parse(content).conditions
 
 def get_acts(content):
-    issuer = get_issuer(content)
-    content = normalize(content)
-    resolve = re.search('resolve(:)?', content)
-    signed = re.search('documento assinado eletronicamente por', content)
-    if resolve:
-        content = content[resolve.span()[1]:].strip()
-        article = re.search('^ar(t)?[\.\,]', content)
-        decimal = re.search('^\d+\.\s', content)
-        roman = re.search('^[\|il][-\—\s\.]', content)
-        search = []
-        if article:
-            end = re.search('ar(t)?[\.\,].+vigor', content)
-            if end:
-                content = content[:end.span()[0]].strip()
-                considering = re.search('\nconsiderando:', content)
-                if considering and resolve.span()[0] < considering.span()[0]:
-                    content[:considering.span()[0]]
-            elif issuer:
-                if signed:
-                    content = content[:signed.span()[0]].strip()
-                content = content[:unidecode.unidecode(content).rfind(issuer.lower())].strip()
-            search.append('^ar(t)?[\.\,]')
-            search.append('^ar(t)?[\.\,][^a-z]+')
-        elif decimal:
-            return 'decimal'
-            end = re.search('^\d+\.\s.+vigor', content)
-            if end:
-                content = content[:end.span()[0]].strip()
-                considering = re.search('\nconsiderando:', content)
-                if considering and resolve.span()[0] < considering.span()[0]:
-                    content[:considering.span()[0]]
-            elif issuer:
-                if signed:
-                    content = content[:signed.span()[0]].strip()
-                content = content[:unidecode.unidecode(content).rfind(issuer.lower())].strip()
-            search.append('^ar(t)?\.')
-            search.append('^ar(t)?\.[^a-z]+')
-        elif roman:
-            end = re.search('[\|il]+[-\—\s\.]+.+vigor', content)
-            if end:
-                content = content[:end.span()[0]].strip()
-                considering = re.search('\nconsiderando:', content)
-                if considering and resolve.span()[0] < considering.span()[0]:
-                    content[:considering.span()[0]]
-            elif issuer:
-                if signed:
-                    content = content[:signed.span()[0]].strip()
-                content = content[:unidecode.unidecode(content).rfind(issuer.lower())].strip()
-            search.append('^[\|il]+[-\—\s\.]')
-            search.append('^[\|il]+[-\—\s\.][^a-z]+')
-        else:
-            if issuer:
-                if signed:
-                    content = content[:signed.span()[0]].strip()
-                content = content[:unidecode.unidecode(content).rfind(unidecode.unidecode(issuer.lower()))].strip()
-            return [content.replace('\n', ' ').strip().capitalize()]
-        if search:
-            content = content.split('\n')
-            index = 0
-            while index < len(content):
-                if not re.search(search[0], content[index]):
-                    content[index - 1] += ' ' + content[index]
-                    del content[index]
-                else:
-                    content[index] = re.sub(search[1], '', content[index]).capitalize()
-                    index += 1
-            return content
-    return None
+    return parse(content).acts
 
+@timed('get_references')
 def get_references(act):
-    servants = []
-    for row in reader:
-        if dict(row)['NAME'].lower() in unidecode.unidecode(act).lower():
-            servants.append(dict(row)['NAME'])
-    return servants
+    return get_registry().get_references(act)
 
 def classify_act(act):
-    search_terms = [
-        SearchTerm('aceleracao_promocao', ['conceder', 'aceleração', 'promoção', 'classe']),
-        SearchTerm('adicional_insalubridade', ['conceder', 'adicional', 'insalubridade']),
-        SearchTerm('adicional_periculosidade', ['conceder', 'adicional', 'periculosidade']),
-        SearchTerm('afastamento', ['afastamento']),
-        SearchTerm('agradecimento', ['agradecer']),
-        SearchTerm('alteracao_estrutura_organizacional', ['alterar', 'parcialmente', 'estrutura', 'organizacional']),
-        SearchTerm('alteracao_jornada_trabalho', ['alterar', 'jornada', 'trabalho']),
-        SearchTerm('ambiente_organizacional', ['homologar', 'ambiente', 'organizacional']),
-        SearchTerm('autorizacao_conducao_veiculos', ['autorizar', 'veículo']),
-        SearchTerm('avaliacao_estagio_probatorio', ['homologar', 'avaliação', 'estágio', 'probatório']),
-        SearchTerm('convocacao', ['convocar', 'concurso', 'público']),
-        SearchTerm('designacao_chefia', ['designar', 'ocupar', 'função']),
-        SearchTerm('designacao_comissao', ['designar', 'comissão']),
-        SearchTerm('designacao_grupo_trabalho', ['designar', 'grupo', 'trabalho']),
-        SearchTerm('designacao_grupo_trabalho', ['instituir', 'grupo', 'trabalho']),
-        SearchTerm('designacao_fiscal_contratos', ['designar', 'fiscal', 'contrato']),
-        SearchTerm('designacao_responsavel_setor', ['designar', 'atuar', 'responsável']),
-        SearchTerm('dispensa_chefia', ['dispensar', 'função']),
-        SearchTerm('dispensa_responsavel_setor', ['dispensar', 'responsável']),
-        SearchTerm('efetivacao_lotacao', ['efetivar', 'unidade', 'administrativa']),
-        SearchTerm('exoneracao', ['exonerar']),
-        SearchTerm('horario_especial_estudante', ['horário', 'especial', 'estudante']),
-        SearchTerm('incentivo_qualificacao', ['conceder', 'incentivo', 'qualificação']),
-        SearchTerm('licenca_atividade_politica', ['conceder', 'licença', 'atividade', 'política']),
-        SearchTerm('licenca_capacitacao', ['conceder', 'licença', 'capacitação']),
-        SearchTerm('licenca_interesse_particular', ['conceder', 'licença', 'interesses', 'particulares']),
-        SearchTerm('licenca_premio', ['conceder', 'licença', 'prêmio']),
-        SearchTerm('localizacao_ambiente_atuacao', ['localizar', 'ambiente', 'atuação']),
-        SearchTerm('nomeacao', ['nomear', 'concurso', 'público']),
-        SearchTerm('progressao_capacitacao', ['conceder', 'progressão', 'capacitação']),
-        SearchTerm('progressao_desempenho', ['conceder', 'progressão', 'desempenho']),
-        SearchTerm('progressao_merito', ['conceder', 'progressão', 'mérito']),
-        SearchTerm('promocao_desempenho', ['conceder', 'promoção', 'desempenho']),
-        SearchTerm('reconhecimento_saberes_competencias', ['conceder', 'reconhecimento', 'saberes', 'competências']),
-        SearchTerm('reducao_jornada_trabalho', ['autorizar', 'alteração', 'jornada', 'trabalho']),
-        SearchTerm('nomeacao', ['remover', 'servidor']),
-        SearchTerm('retribuicao_titulacao', ['conceder', 'retribuição', 'titulação']),
-        SearchTerm('substituicao_chefia', ['designar', 'responder', 'provisoriamente', 'afastamento']),
-    ]
-    for search_term in search_terms:
-        found = True
-        for keyword in search_term.keywords:
-            if not re.search(keyword, act.lower()):
-                found = False
-                break
-        if found:
-            return search_term.description
-    return None
+    return get_classifier().classify(act)
+
+@timed('classify_act')
+def classify_acts(acts):
+    return get_classifier().classify_all(acts)
 
 def print_info(content):
     print('Número: ' + str(get_number(content)))
@@ -326,10 +324,31 @@ def print_info(content):
         for reference in get_reference(act):
             print('\t\t' + reference)
 
-def get_rdf_graph(ordinances):
-    ORD = Namespace('http://purl.org/ordinance-ontology/')
-    SCHEMA = Namespace('http://schema.org/')
-
+def add_public_servant(sink, name, emitted):
+    functional_id = get_functional_id(name)
+    public_servant = URIRef('public_servant_' + functional_id)
+    if public_servant in emitted:
+        return public_servant
+    emitted.add(public_servant)
+
+    label = get_position(name)
+    position = URIRef('position_' + get_slug(label))
+    if position not in emitted:
+        emitted.add(position)
+        sink.add((position, RDF.type, SKOS.Concept))
+        sink.add((position, SKOS.prefLabel, Literal(label, datatype=XSD.string)))
+
+    entailment = URIRef('entailment_' + functional_id + '_' + get_slug(label))
+    sink.add((entailment, RDF.type, ORD.Entailment))
+    sink.add((entailment, ORD.hasPosition, position))
+    sink.add((entailment, ORD.functionalId, Literal(functional_id, datatype=XSD.string)))
+
+    sink.add((public_servant, RDF.type, ORD.PublicServant))
+    sink.add((public_servant, SCHEMA.name, Literal(name, datatype=XSD.string)))
+    sink.add((public_servant, ORD.entailedTo, entailment))
+    return public_servant
+
+def get_graph():
     graph = Graph(base='http://purl.org/ordinance-ontology/')
     graph.bind('rdf', RDF)
     graph.bind('foaf', FOAF)
@@ -338,118 +357,203 @@ def get_rdf_graph(ordinances):
     graph.bind('schema', SCHEMA)
     graph.bind('skos', SKOS)
     graph.bind('xsd', XSD)
+    return graph
+
+def get_rdf_graph(ordinances):
+    graph = get_graph()
+    emit_triples(ordinances, graph)
+    return graph
 
-    global_count = 1
+def get_ordinance_id(document):
+    return document.publisher + '_' + str(document.date_published) + '_' + str(document.number)
 
+def get_fields(ordinances):
     for ordinance in ordinances:
-        print('Ordinance #' + str(global_count))
-        content = dict(ordinance)['content']
-
-        ordinance_description = get_description(content)
-        ordinance_publisher = get_publisher(content)
-        ordinance_number = get_number(content)
-        ordinance_date_published = get_date_published(content)
-        ordinance_id = ordinance_publisher + '_' + str(ordinance_date_published) + '_' + str(ordinance_number)
+        stats.count('ordinances')
+        document = ParsedOrdinance(dict(ordinance)['content'])
+        issuer = document.validated_issuer
+        row = {'ordinance_id': get_ordinance_id(document), 'number': document.number, 'date_published': document.date_published,
+            'publisher': document.publisher, 'issuer': get_functional_id(issuer) if issuer else None}
+        acts = document.acts or []
+        if not acts:
+            yield dict(row, act_index=None, act_type=None, references=[])
+        for index, (act, act_class) in enumerate(zip(acts, classify_acts(acts)), 1):
+            yield dict(row, act_index=index, act_type=act_class, references=[get_functional_id(name) for name in get_references(act)])
+
+def emit_triples(ordinances, sink):
+    emitted = set()
+
+    for ordinance in ordinances:
+        stats.count('ordinances')
+        document = ParsedOrdinance(dict(ordinance)['content'])
+
+        ordinance_description = document.description
+        ordinance_publisher = document.publisher
+        ordinance_number = document.number
+        ordinance_date_published = document.date_published
+        ordinance_id = get_ordinance_id(document)
         ordinance_url = dict(ordinance)['url']
 
         ordinance = URIRef(ordinance_id)
 
-        graph.add((ordinance, RDF.type, ORD.Ordinance))
-        graph.add((ordinance, ORD.number, Literal(ordinance_number, datatype=XSD.string)))
-        graph.add((ordinance, SCHEMA.datePublished, Literal(ordinance_date_published, datatype=XSD.dateTime)))
-        graph.add((ordinance, SCHEMA.description, Literal(ordinance_description, datatype=XSD.string)))
-        graph.add((ordinance, ORD.directPublisher, URIRef(ordinance_publisher)))
-        graph.add((ordinance, SCHEMA.url, Literal(ordinance_url, datatype=XSD.anyURI)))
+        sink.add((ordinance, RDF.type, ORD.Ordinance))
+        sink.add((ordinance, ORD.number, Literal(ordinance_number, datatype=XSD.string)))
+        sink.add((ordinance, SCHEMA.datePublished, Literal(ordinance_date_published, datatype=XSD.dateTime)))
+        sink.add((ordinance, SCHEMA.description, Literal(ordinance_description, datatype=XSD.string)))
+        sink.add((ordinance, ORD.directPublisher, URIRef(ordinance_publisher)))
+        sink.add((ordinance, SCHEMA.url, Literal(ordinance_url, datatype=XSD.anyURI)))
 
-        ordinance_issuer = get_validated_issuer(content)
+        ordinance_issuer = document.validated_issuer
         if ordinance_issuer:
-            issuer_position = get_position(ordinance_issuer)
-            issuer_function = get_function(content)
-            issuer_functional_id = get_functional_id(ordinance_issuer)
-
-            position = URIRef('position_' + get_random_hash())
-            graph.add((position, RDF.type, SKOS.Concept))
-            graph.add((position, SKOS.prefLabel, Literal(issuer_position, datatype=XSD.string)))
-
-            entailment = URIRef('entailment_' + get_random_hash())
-            graph.add((entailment, RDF.type, ORD.Entailment))
-            graph.add((entailment, ORD.hasPosition, position))
-            graph.add((entailment, ORD.functionalId, Literal(issuer_functional_id, datatype=XSD.string)))
+            issuer_function = document.function
+            public_servant_issuer = add_public_servant(sink, ordinance_issuer, emitted)
 
+            mandate = URIRef('mandate_' + get_functional_id(ordinance_issuer) + ('_' + issuer_function if issuer_function else ''))
+            if mandate not in emitted:
+                emitted.add(mandate)
+                sink.add((mandate, RDF.type, ORD.Mandate))
+                if issuer_function:
+                        sink.add((mandate, ORD.hasFunction, URIRef(issuer_function)))
+                sink.add((public_servant_issuer, ORD.exercises, mandate))
 
-            mandate = URIRef('mandate_' + get_random_hash())
-            graph.add((mandate, RDF.type, ORD.Mandate))
-            if issuer_function:
-                    graph.add((mandate, ORD.hasFunction, URIRef(issuer_function)))
+            sink.add((ordinance, ORD.issuedBy, mandate))
 
-            public_servant_issuer = URIRef('public_servant_' + issuer_functional_id)
-            graph.add((public_servant_issuer, RDF.type, ORD.PublicServant))
-            graph.add((public_servant_issuer, SCHEMA.name, Literal(ordinance_issuer, datatype=XSD.string)))
-            graph.add((public_servant_issuer, ORD.entailedTo, entailment))
-            graph.add((public_servant_issuer, ORD.exercises, mandate))
-
-            graph.add((ordinance, ORD.issuedBy, mandate))
-
-        conditions = get_conditions(content)
+        conditions = document.conditions
         if conditions:
             count = 1
             for c in conditions:
                 condition = URIRef(ordinance_id + '_condition_' + str(count))
-                graph.add((condition, RDF.type, ORD.Condition))
-                graph.add((condition, SCHEMA.description, Literal(c, datatype=XSD.string)))
-                graph.add((ordinance, ORD.hasCondition, condition))
+                sink.add((condition, RDF.type, ORD.Condition))
+                sink.add((condition, SCHEMA.description, Literal(c, datatype=XSD.string)))
+                sink.add((ordinance, ORD.hasCondition, condition))
                 count += 1
 
-        acts = get_acts(content)
+        acts = document.acts
         if acts:
+            stats.count('acts', len(acts))
             count = 1
-            for a in acts:
+            for a, act_class in zip(acts, classify_acts(acts)):
                 act = URIRef(ordinance_id + '_act_' + str(count))
-                graph.add((act, RDF.type, ORD.Act))
-                graph.add((act, SCHEMA.description, Literal(a, datatype=XSD.string)))
-                graph.add((ordinance, ORD.hasAct, act))
+                sink.add((act, RDF.type, ORD.Act))
+                sink.add((act, SCHEMA.description, Literal(a, datatype=XSD.string)))
+                sink.add((ordinance, ORD.hasAct, act))
 
-                act_class = classify_act(a)
                 if act_class:
-                    graph.add((act, ORD.hasType, URIRef(act_class)))
+                    sink.add((act, ORD.hasType, URIRef(act_class)))
 
                 names_referenced = get_references(a)
                 if names_referenced:
                     for name in names_referenced:
-                        functional_id = get_functional_id(name)
+                        public_servant = add_public_servant(sink, name, emitted)
 
-                        position = URIRef('position_' + get_random_hash())
-                        graph.add((position, RDF.type, SKOS.Concept))
-                        graph.add((position, SKOS.prefLabel, Literal(get_position(name), datatype=XSD.string)))
+                        reference = URIRef(ordinance_id + '_act_' + str(count) + '_reference_' + get_functional_id(name))
+                        sink.add((reference, ORD.subject, public_servant))
 
-                        entailment = URIRef('entailment_' + get_random_hash())
-                        graph.add((entailment, RDF.type, ORD.Entailment))
-                        graph.add((entailment, ORD.hasPosition, position))
-                        graph.add((entailment, ORD.functionalId, Literal(functional_id, datatype=XSD.string)))
+                        sink.add((act, ORD.references, reference))
+                count += 1
 
-                        public_servant = URIRef('public_servant_' + functional_id)
-                        graph.add((public_servant, RDF.type, ORD.PublicServant))
-                        graph.add((public_servant, SCHEMA.name, Literal(name, datatype=XSD.string)))
-                        graph.add((public_servant, ORD.entailedTo, entailment))
+class GraphOutput:
+    extensions = {'turtle': '.ttl', 'ntriples': '.nt', 'nquads': '.nq'}
 
-                        reference = URIRef('reference_' + get_random_hash())
-                        graph.add((reference, ORD.subject, public_servant))
+    def __init__(self, directory='graphs', format='turtle', compress=False):
+        self.directory = directory
+        self.format = format
+        self.compress = compress and format != 'turtle'
 
-                        graph.add((act, ORD.references, reference))
-                count += 1
-        global_count = global_count + 1
-    return graph
+    def get_path(self, number):
+        return os.path.join(self.directory, 'graph_' + str(number) + self.extensions[self.format] + ('.gz' if self.compress else ''))
+
+    @staticmethod
+    def get_graph_number(path):
+        return int(re.search(r'graph_(\d+)', os.path.basename(path)).group(1))
+
+    def get_paths(self):
+        paths = glob.glob(os.path.join(self.directory, 'graph_*' + self.extensions[self.format] + ('.gz' if self.compress else '')))
+        return sorted(paths, key=GraphOutput.get_graph_number)
+
+    def write(self, number, ordinances):
+        path = self.get_path(number)
+        if self.format == 'turtle':
+            with timer('emit'):
+                graph = get_rdf_graph(ordinances)
+            with timer('serialize'):
+                graph.serialize(destination=path + '.tmp', format='turtle')
+        else:
+            graph = URIRef('graph_' + str(number)) if self.format == 'nquads' else None
+            with timer('emit'), TripleWriter(path + '.tmp', graph, self.compress) as writer:
+                emit_triples(ordinances, writer)
+        os.replace(path + '.tmp', path)
+
+def get_indexed_fields(content):
+    document = ParsedOrdinance(content or '')
+    try:
+        number, date_published = document.number, document.date_published
+        publisher = document.publisher
+    except IndexError:
+        return None, None, None, EXTRACTOR_VERSION
+    return publisher, str(number) if number is not None else None, date_published.isoformat() if date_published else None, EXTRACTOR_VERSION
+
+def index_fields(batch_size=100):
+    for batch in OrdinanceDAO.iterate_unindexed(EXTRACTOR_VERSION, batch_size):
+        rows = [(ordinance['id'],) + get_indexed_fields(ordinance['content']) for ordinance in batch]
+        OrdinanceDAO.update_fields(rows)
+        stats.count('indexed', len(rows))
+
+def write_graph(chunk):
+    number, first_id, last_id, size, output = chunk
+    with timer('sqlite'):
+        ordinances = OrdinanceDAO.get_range(first_id, last_id)
+    output.write(number, ordinances)
+    return number, first_id, last_id, [(o['id'], Manifest.get_hash(o)) for o in ordinances], stats.collect()
+
+def get_chunks(output, chunk_size=100):
+    paths = output.get_paths()
+    last_written = GraphOutput.get_graph_number(paths[-1]) if paths else 0
+    for number, (first_id, last_id, size) in enumerate(OrdinanceDAO.get_bounds(chunk_size), 1):
+        # Only the last graph written can have been a partial chunk that new rows have joined since
+        if number != last_written and size == chunk_size and os.path.exists(output.get_path(number)):
+            print('Graph #' + str(number) + ' already exists, skipping!')
+            continue
+        yield number, first_id, last_id, size, output
+
+def get_changed_chunks(output, manifest, chunk_size=100):
+    number = 0
+    for number, ordinances in enumerate(OrdinanceDAO.iterate_batches(chunk_size), 1):
+        first_id, last_id = ordinances[0]['id'], ordinances[-1]['id']
+        digest = Manifest.get_digest([(o['id'], Manifest.get_hash(o)) for o in ordinances])
+        if os.path.exists(output.get_path(number)) and manifest.is_current(number, first_id, last_id, EXTRACTOR_VERSION, digest):
+            continue
+        yield number, first_id, last_id, len(ordinances), output
+    for stale in manifest.prune(number):
+        if os.path.exists(output.get_path(stale)):
+            os.remove(output.get_path(stale))
+        print('Graph #' + str(stale) + ' removed!')
+
+def generate_graphs(output, chunk_size=100, workers=1, incremental=False, progress_interval=10):
+    os.makedirs(output.directory, exist_ok=True)
+    manifest = Manifest(os.path.join(output.directory, 'manifest.db')) if incremental else None
+    if manifest:
+        chunks = list(get_changed_chunks(output, manifest, chunk_size))
+        print(str(len(chunks)) + ' graphs to update!')
+    else:
+        chunks = list(get_chunks(output, chunk_size))
+    progress = Progress(sum(chunk[3] for chunk in chunks), progress_interval)
+    with multiprocessing.Pool(workers) if workers > 1 else contextlib.nullcontext() as pool:
+        results = pool.imap_unordered(write_graph, chunks) if pool else map(write_graph, chunks)
+        for number, first_id, last_id, hashes, snapshot in results:
+            stats.merge(snapshot)
+            stats.count('graphs')
+            if manifest:
+                manifest.update(number, first_id, last_id, EXTRACTOR_VERSION, hashes)
+            print('Graph #' + str(number) + ' saved!')
+            progress.update(len(hashes))
+    progress.report()
+    if manifest:
+        manifest.close()
+
+def pretty_print(output, destination):
+    return to_turtle(output.get_paths(), destination, get_graph())
 
 if __name__ == '__main__':
-    ordinances = OrdinanceDAO.get_all()
-    amount = len(ordinances)
-    position = 0
-    number = 1
-    while position < amount:
-        ords = ordinances[position:position + 100]
-        graph = get_rdf_graph(ords)
-        f = open('graphs/graph_' + str(number) + '.ttl', 'a')
-        f.write(graph.serialize(format='turtle').decode('utf-8'))
-        f.close()
-        number += 1
-        position += 100
+    import cli
+    cli.main(['generate'] + sys.argv[1:])
@@ -0,0 +1,81 @@
+import csv, re, unidecode
+from collections import Counter
+from difflib import SequenceMatcher
+from automaton import Automaton
+
+SERVANTS = 'files/public_servants.csv'
+
+class Servant:
+    def __init__(self, functional_id, name, department, position):
+        self.functional_id = functional_id
+        self.name = name
+        self.department = department
+        self.position = position
+        label = re.search(r'[\w ]+', position)
+        self.label = label.group().strip() if label else None
+        self.lower = name.lower()
+
+def get_ngrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class ServantRegistry:
+    def __init__(self, path=None):
+        path = path or SERVANTS
+        with open(path, newline='') as f:
+            self.servants = [Servant(row['ID'], row['NAME'], row['DEPARTMENT'], row['POSITION']) for row in csv.DictReader(f)]
+        self.by_name = {}
+        for servant in self.servants:
+            self.by_name.setdefault(servant.name, servant)
+        self.matcher = Automaton((index, servant.lower) for (index, servant) in enumerate(self.servants))
+        self.ngrams = {}
+        for index, servant in enumerate(self.servants):
+            for ngram in get_ngrams(servant.lower):
+                self.ngrams.setdefault(ngram, []).append(index)
+
+    def get_functional_id(self, name):
+        servant = self.by_name.get(name)
+        return servant.functional_id if servant else None
+
+    def get_position(self, name):
+        servant = self.by_name.get(name)
+        return servant.label if servant else None
+
+    def get_candidates(self, name):
+        # A ratio above 0.9 leaves fewer than 0.1 * (la + lb) unmatched characters, so the
+        # matching blocks cover more than 0.45 * la - 2 trigram positions of the name.
+        bound = 0.45 * len(name) - 2
+        if bound < 0:
+            return range(len(self.servants))
+        counts = Counter()
+        for i in range(len(name) - 2):
+            counts.update(self.ngrams.get(name[i:i + 3], ()))
+        return sorted(index for (index, count) in counts.items() if count > bound)
+
+    def match(self, name):
+        name = name.lower()
+        matcher = SequenceMatcher(a=name)
+        for index in self.get_candidates(name):
+            servant = self.servants[index]
+            if 2 * min(len(name), len(servant.lower)) <= 0.9 * (len(name) + len(servant.lower)):
+                continue
+            matcher.set_seq2(servant.lower)
+            if matcher.quick_ratio() > 0.9 and matcher.ratio() > 0.9:
+                return servant.name
+        return None
+
+    def get_references(self, act):
+        found = self.matcher.search(unidecode.unidecode(act).lower())
+        return [self.servants[index].name for index in sorted(found)]
+
+_registry = None
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = ServantRegistry()
+    return _registry
+
+def load_registry(path):
+    global _registry
+    _registry = ServantRegistry(path)
+    return _registry
@@ -0,0 +1,212 @@
+import json, queue, signal, sys, threading, time
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from instrumentation import stats
+
+def warm():
+    from classifier import get_classifier
+    from servant import get_registry
+    get_registry()
+    get_classifier()
+
+class ListSink:
+    def __init__(self):
+        from sink import to_nt
+        self.to_nt = to_nt
+        self.lines = []
+
+    def add(self, triple):
+        self.lines.append(' '.join(self.to_nt(term) for term in triple) + ' .\n')
+
+def get_rdf(ordinance, format):
+    from rdf_generator import emit_triples, get_rdf_graph
+    if format == 'turtle':
+        return get_rdf_graph([ordinance]).serialize(format='turtle')
+    sink = ListSink()
+    emit_triples([ordinance], sink)
+    return ''.join(sink.lines)
+
+def extract(item):
+    from rdf_generator import ParsedOrdinance, classify_acts, get_functional_id, get_references
+    if 'pdf' in item:
+        from downloader import extract_text
+        item = dict(item, text=extract_text(item['pdf'], workers=1))
+    document = ParsedOrdinance(item['text'])
+    date_published = document.date_published
+    acts = document.acts or []
+    result = {
+        'number': document.number,
+        'date_published': date_published.isoformat() if date_published else None,
+        'publisher': document.publisher,
+        'description': document.description,
+        'issuer': document.validated_issuer,
+        'function': document.function,
+        'conditions': document.conditions or [],
+        'acts': [{'text': act, 'type': act_class, 'references': [{'name': name, 'functional_id': get_functional_id(name)}
+            for name in get_references(act)]} for act, act_class in zip(acts, classify_acts(acts))],
+    }
+    if item.get('rdf'):
+        result['rdf'] = get_rdf({'url': item.get('url') or '', 'content': item['text']}, item['rdf'])
+    if 'pdf' in item:
+        result['text'] = item['text']
+    return result
+
+def extract_batch(items):
+    results = []
+    for item in items:
+        try:
+            results.append((True, extract(item)))
+        except Exception as e:
+            results.append((False, repr(e)))
+    return results
+
+class Batcher:
+    def __init__(self, executor, batch_size=16, window=0.005, queue_size=256):
+        self.executor = executor
+        self.batch_size = batch_size
+        self.window = window
+        self.queue = queue.Queue(queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self.queue.put_nowait((item, future))
+        return future
+
+    def run(self):
+        while True:
+            requests = [self.queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(requests) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    requests.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            futures = [future for (_, future) in requests]
+            stats.count('batches')
+            stats.count('requests', len(requests))
+            try:
+                batch = self.executor.submit(extract_batch, [item for (item, _) in requests])
+            except Exception as e:
+                self.error = e
+                self.fail(futures, e)
+                continue
+            batch.add_done_callback(lambda batch, futures=futures: self.resolve(futures, batch))
+
+    def fail(self, futures, error):
+        stats.count('failed_batches')
+        for future in futures:
+            future.set_exception(error)
+
+    def resolve(self, futures, batch):
+        if batch.exception():
+            if isinstance(batch.exception(), BrokenExecutor):
+                self.error = batch.exception()
+            self.fail(futures, batch.exception())
+            return
+        for future, (ok, result) in zip(futures, batch.result()):
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(ValueError(result))
+
+class ExtractionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    batcher = None
+    timeout_seconds = 300
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            if self.batcher.error:
+                self.send_json(503, {'status': 'error', 'error': repr(self.batcher.error), 'queued': self.batcher.queue.qsize()})
+            else:
+                self.send_json(200, {'status': 'ok', 'queued': self.batcher.queue.qsize()})
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def get_item(self):
+        url = urlparse(self.path)
+        parameters = {key: values[-1] for (key, values) in parse_qs(url.query).items()}
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.headers.get('Content-Type', '').startswith('application/pdf'):
+            if b'%PDF' not in body[:1024]:
+                raise ValueError('expected a PDF body')
+            return {'pdf': body, 'url': parameters.get('url'), 'rdf': parameters.get('rdf')}
+        item = json.loads(body or b'{}')
+        if not isinstance(item, dict) or not isinstance(item.get('text'), str):
+            raise ValueError('expected a JSON object with a "text" field')
+        from rdf_generator import normalize
+        try:
+            normalize(item['text'])
+        except IndexError:
+            raise ValueError('"text" has no ordinance content')
+        if item.get('rdf') is True:
+            item['rdf'] = 'ntriples'
+        return {'text': item['text'], 'url': item.get('url'), 'rdf': item.get('rdf') or parameters.get('rdf')}
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/extract':
+            self.send_json(404, {'error': 'not found'})
+            return
+        try:
+            item = self.get_item()
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        if item['rdf'] not in (None, 'ntriples', 'turtle'):
+            self.send_json(400, {'error': 'rdf must be ntriples or turtle'})
+            return
+        if self.batcher.error:
+            self.send_json(503, {'error': 'worker pool is unavailable: ' + repr(self.batcher.error)})
+            return
+        try:
+            future = self.batcher.submit(item)
+        except queue.Full:
+            self.send_json(503, {'error': 'too many pending requests'})
+            return
+        try:
+            self.send_json(200, future.result(self.timeout_seconds))
+        except BrokenExecutor as e:
+            self.send_json(503, {'error': 'worker pool is unavailable: ' + repr(e)})
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+
+def serve(host='127.0.0.1', port=8080, workers=None, batch_size=16, window=0.005, queue_size=256):
+    warm()
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with ProcessPoolExecutor(workers, initializer=warm) as executor:
+        executor.submit(warm).result()
+        ExtractionHandler.batcher = Batcher(executor, batch_size, window, queue_size)
+        server = ExtractionServer((host, port), ExtractionHandler)
+        print('Serving on http://' + host + ':' + str(server.server_address[1]) + '/extract')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+if __name__ == '__main__':
+    import cli
+    cli.main(['serve'] + sys.argv[1:])
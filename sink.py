@@ -0,0 +1,64 @@
+import gzip, os
+from rdflib import BNode, Dataset, Literal
+
+BASE = 'http://purl.org/ordinance-ontology/'
+
+def escape(text):
+    return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+
+def to_nt(term, base=BASE):
+    if isinstance(term, Literal):
+        value = '"' + escape(str(term)) + '"'
+        if term.language:
+            return value + '@' + term.language
+        if term.datatype:
+            return value + '^^<' + str(term.datatype) + '>'
+        return value
+    if isinstance(term, BNode):
+        return '_:' + str(term)
+    term = str(term)
+    return '<' + (term if ':' in term else base + term) + '>'
+
+def open_text(path, mode='r', compress=None):
+    if compress or (compress is None and path.endswith('.gz')):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+class TripleWriter:
+    def __init__(self, path, graph=None, compress=None):
+        self.path = path
+        self.graph = ' ' + to_nt(graph) if graph else ''
+        self.file = open_text(path, 'w', compress)
+        self.count = 0
+
+    def add(self, triple):
+        subject, predicate, object = triple
+        self.file.write(to_nt(subject) + ' ' + to_nt(predicate) + ' ' + to_nt(object) + self.graph + ' .\n')
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def get_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    return {'.nt': 'nt', '.nq': 'nquads', '.ttl': 'turtle'}[os.path.splitext(name)[1]]
+
+def to_turtle(paths, destination, graph):
+    for path in paths:
+        with open_text(path) as f:
+            data = f.read()
+        if get_format(path) == 'nquads':
+            dataset = Dataset()
+            dataset.parse(data=data, format='nquads')
+            for subject, predicate, object, _ in dataset.quads():
+                graph.add((subject, predicate, object))
+        else:
+            graph.parse(data=data, format=get_format(path))
+    graph.serialize(destination=destination, format='turtle')
+    return graph
@@ -0,0 +1,165 @@
+import contextlib, hashlib, os, re, sqlite3
+
+ORD = 'http://purl.org/ordinance-ontology/'
+SCHEMA = 'http://schema.org/'
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+TERM = re.compile(r'<[^>]*>|_:\S+|"(?:[^"\\]|\\.)*"(?:@[\w-]+|\^\^<[^>]*>)?')
+
+def get_value(term):
+    if term.startswith('"'):
+        return re.sub(r'\\(.)', lambda match: {'n': '\n', 'r': '\r'}.get(match.group(1), match.group(1)), term[1:term.rindex('"')])
+    return term[1:-1] if term.startswith('<') else term
+
+def get_uri(namespace, name):
+    return '<' + namespace + name + '>'
+
+def get_literal(value, datatype='string'):
+    value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+    return '"' + value + '"^^<' + XSD + datatype + '>'
+
+def get_paths(directory):
+    return [os.path.join(directory, name) for name in os.listdir(directory) if re.match(r'graph_\d+\.(ttl|nt|nq)(\.gz)?$', name)]
+
+def get_shard_number(path):
+    return int(re.search(r'graph_(\d+)', os.path.basename(path)).group(1))
+
+class ShardLoader:
+    def __init__(self, store, number):
+        self.store = store
+        self.number = number
+        self.rows = []
+        from sink import to_nt
+        self.to_nt = to_nt
+
+    def add(self, triple):
+        self.add_terms([self.to_nt(term) for term in triple])
+
+    def add_terms(self, terms):
+        self.rows.append(tuple(self.store.get_term_id(term) for term in terms) + (self.number,))
+        if len(self.rows) >= 10000:
+            self.flush()
+
+    def flush(self):
+        self.store.connection.executemany('INSERT OR IGNORE INTO triples (subject, predicate, object, shard) VALUES (?, ?, ?, ?)', self.rows)
+        self.rows = []
+
+class TripleStore:
+    def __init__(self, path='graphs/store.db'):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.terms = {}
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE, value TEXT)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS triples (subject INTEGER, predicate INTEGER, object INTEGER, shard INTEGER, '
+                'PRIMARY KEY (subject, predicate, object, shard)) WITHOUT ROWID')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS triples_pos ON triples (predicate, object, subject)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS triples_osp ON triples (object, subject, predicate)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS triples_shard ON triples (shard)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS shards (number INTEGER PRIMARY KEY, path TEXT, digest TEXT)')
+
+    def get_term_id(self, term):
+        if term not in self.terms:
+            self.connection.execute('INSERT OR IGNORE INTO terms (term, value) VALUES (?, ?)', (term, get_value(term)))
+            self.terms[term] = self.connection.execute('SELECT id FROM terms WHERE term = ?', (term,)).fetchone()[0]
+        return self.terms[term]
+
+    def find_term_id(self, term):
+        row = self.connection.execute('SELECT id FROM terms WHERE term = ?', (term,)).fetchone()
+        return row[0] if row else None
+
+    @contextlib.contextmanager
+    def shard(self, number, path=None, digest=None):
+        with self.connection:
+            self.connection.execute('DELETE FROM triples WHERE shard = ?', (number,))
+            loader = ShardLoader(self, number)
+            yield loader
+            loader.flush()
+            self.connection.execute('INSERT OR REPLACE INTO shards (number, path, digest) VALUES (?, ?, ?)', (number, path, digest))
+
+    def remove_shard(self, number):
+        with self.connection:
+            self.connection.execute('DELETE FROM triples WHERE shard = ?', (number,))
+            self.connection.execute('DELETE FROM shards WHERE number = ?', (number,))
+
+    def load_file(self, path, number, digest=None):
+        from sink import get_format, open_text
+        format = get_format(path)
+        with self.shard(number, path, digest) as loader:
+            if format == 'turtle':
+                from rdflib import Graph
+                graph = Graph()
+                graph.parse(path, format='turtle')
+                for triple in graph:
+                    loader.add(triple)
+            else:
+                with open_text(path) as f:
+                    for line in f:
+                        terms = TERM.findall(line)
+                        if len(terms) >= 3:
+                            loader.add_terms(terms[:3])
+
+    def load(self, paths, prune=True):
+        loaded = {}
+        for row in self.connection.execute('SELECT number, digest FROM shards'):
+            loaded[row[0]] = row[1]
+        numbers = set()
+        changed = False
+        for path in paths:
+            number = get_shard_number(path)
+            numbers.add(number)
+            with open(path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            if loaded.get(number) == digest:
+                continue
+            self.load_file(path, number, digest)
+            changed = True
+            print('Graph #' + str(number) + ' loaded!')
+        if prune:
+            for number in set(loaded) - numbers:
+                self.remove_shard(number)
+                changed = True
+                print('Graph #' + str(number) + ' removed!')
+        if changed:
+            self.connection.execute('ANALYZE')
+
+    def query(self, statement, parameters=()):
+        return self.connection.execute(statement, parameters).fetchall()
+
+    def get_acts(self, joins, parameters):
+        statement = ('SELECT DISTINCT ordinance_url.value, act_term.value, description.value FROM triples has_act '
+            'JOIN terms act_term ON act_term.id = has_act.object '
+            'JOIN triples act_description ON act_description.subject = has_act.object AND act_description.predicate = ? '
+            'JOIN terms description ON description.id = act_description.object '
+            'JOIN triples url ON url.subject = has_act.subject AND url.predicate = ? '
+            'JOIN terms ordinance_url ON ordinance_url.id = url.object ' + joins +
+            ' WHERE has_act.predicate = ? ORDER BY ordinance_url.value, act_term.value, description.value')
+        ids = [self.find_term_id(get_uri(SCHEMA, 'description')), self.find_term_id(get_uri(SCHEMA, 'url'))]
+        return self.query(statement, ids + list(parameters) + [self.find_term_id(get_uri(ORD, 'hasAct'))])
+
+    def acts_by_servant(self, name):
+        joins = ('JOIN triples reference ON reference.subject = has_act.object AND reference.predicate = ? '
+            'JOIN triples subject ON subject.subject = reference.object AND subject.predicate = ? '
+            'JOIN triples servant ON servant.subject = subject.object AND servant.predicate = ? AND servant.object = ?')
+        return self.get_acts(joins, [self.find_term_id(get_uri(ORD, 'references')), self.find_term_id(get_uri(ORD, 'subject')),
+            self.find_term_id(get_uri(SCHEMA, 'name')), self.find_term_id(get_literal(name))])
+
+    def acts_by_type(self, type):
+        joins = 'JOIN triples type ON type.subject = has_act.object AND type.predicate = ? AND type.object = ?'
+        return self.get_acts(joins, [self.find_term_id(get_uri(ORD, 'hasType')), self.find_term_id(get_uri(ORD, type))])
+
+    def acts_by_publisher(self, publisher, since=None, until=None):
+        joins = 'JOIN triples publisher ON publisher.subject = has_act.subject AND publisher.predicate = ? AND publisher.object = ?'
+        parameters = [self.find_term_id(get_uri(ORD, 'directPublisher')), self.find_term_id(get_uri(ORD, publisher))]
+        if since or until:
+            joins += (' JOIN triples published ON published.subject = has_act.subject AND published.predicate = ?'
+                ' JOIN terms date ON date.id = published.object AND substr(date.value, 1, 10) BETWEEN ? AND ?')
+            parameters += [self.find_term_id(get_uri(SCHEMA, 'datePublished')), since or '0000-00-00', until or '9999-99-99']
+        return self.get_acts(joins, parameters)
+
+    def close(self):
+        self.connection.close()
+
+if __name__ == '__main__':
+    import cli, sys
+    cli.main(['query'] + sys.argv[1:])
@@ -0,0 +1,11 @@
+import csv, os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVANTS = os.path.join(ROOT, 'files', 'public_servants.csv')
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def read_rows():
+    with open(SERVANTS, newline='') as f:
+        return list(csv.DictReader(f))
@@ -0,0 +1,29 @@
+import itertools, re
+from benchmarks.corpus import ACTS
+from classifier import SEARCH_TERMS, ActClassifier
+
+# Keyword loop from the original rdf_generator, kept as the reference behaviour.
+def linear_classify(act):
+    for search_term in SEARCH_TERMS:
+        if all(re.search(keyword, act.lower()) for keyword in search_term.keywords):
+            return search_term.description
+    return None
+
+def get_acts():
+    phrases = [' '.join(search_term.keywords) for search_term in SEARCH_TERMS]
+    acts = [act.format(name='Fulano de Tal', id='1000001') for act in ACTS]
+    acts += phrases + [phrase.upper() for phrase in phrases]
+    acts += [first + ', ' + second for (first, second) in itertools.permutations(phrases[::3], 2)]
+    acts += ['conceder progressão por capacitação e mérito', 'designar, com a comissão, o servidor para ocupar a função',
+        'concederam adicionais de insalubridade', 'nada a declarar', '']
+    return acts
+
+def test_classify_matches_keyword_loop():
+    classifier = ActClassifier()
+    for act in get_acts():
+        assert classifier.classify(act) == linear_classify(act)
+
+def test_classify_all():
+    classifier = ActClassifier()
+    acts = get_acts()
+    assert classifier.classify_all(acts) == [linear_classify(act) for act in acts]
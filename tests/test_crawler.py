@@ -0,0 +1,102 @@
+import collections, http.server, threading
+import pytest
+import downloader, ordinance
+from benchmarks.corpus import CorpusGenerator
+from conftest import read_rows
+from frontier import CrawlState
+from ordinance import OrdinanceDAO
+from rdf_generator import EXTRACTOR_VERSION
+
+PER_PAGE = 10
+
+class Portal:
+    def __init__(self, total):
+        self.total = total
+        self.hits = collections.Counter()
+        self.lock = threading.Lock()
+
+    def get(self, path, base):
+        with self.lock:
+            self.hits[path] += 1
+        if path.startswith('/busca'):
+            page = int(path.split('=')[1])
+            last = self.total - page * PER_PAGE
+            body = ''.join('<a class="state-published" href="%s/detail/%d">Portaria %d</a>' % (base, i, i)
+                for i in range(last, max(last - PER_PAGE, 0), -1))
+            if last - PER_PAGE > 0:
+                body += '<a class="proximo" href="%s/busca?page=%d">Próximo</a>' % (base, page + 1)
+        elif path.startswith('/detail/'):
+            number = path.split('/')[-1]
+            body = '<a href="%s/file/%s.pdf">Portaria %s.pdf</a>' % (base, number, number)
+        else:
+            body = 'PDF ' + path.split('/')[-1][:-4]
+        return body.encode('utf-8')
+
+@pytest.fixture
+def portal():
+    portal = Portal(35)
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            data = portal.get(self.path, 'http://127.0.0.1:%d' % self.server.server_address[1])
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    portal.url = 'http://127.0.0.1:%d/busca?page=0' % server.server_address[1]
+    yield portal
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    path = str(tmp_path / 'database.db')
+    monkeypatch.setattr(ordinance, 'DATABASE', path)
+    generator = CorpusGenerator(read_rows(), seed=7, noise=0)
+    monkeypatch.setattr(downloader, 'extract_text', lambda file, **options: generator.generate(int(file.split()[1])))
+    yield path
+    OrdinanceDAO.close(path)
+
+def crawl(portal, state, stop_after=5):
+    crawler = downloader.Crawler(portal.url, fetch_workers=4, ocr_workers=2, interval=0, state=CrawlState(state))
+    crawler.run(progress_interval=0, stop_after=stop_after)
+    crawler.state.close()
+
+def get_hits(portal, prefix):
+    return {path: count for (path, count) in portal.hits.items() if path.startswith(prefix)}
+
+def test_crawl_stores_every_ordinance_once(portal, database, tmp_path):
+    crawl(portal, str(tmp_path / 'crawl.db'))
+    urls = OrdinanceDAO.existing_urls()
+    assert OrdinanceDAO.count() == portal.total
+    assert {url.split('/')[-1] for url in urls} == {'%d.pdf' % i for i in range(1, portal.total + 1)}
+    assert len(get_hits(portal, '/detail/')) == portal.total and set(get_hits(portal, '/detail/').values()) == {1}
+    assert len(get_hits(portal, '/file/')) == portal.total and set(get_hits(portal, '/file/').values()) == {1}
+    assert sum(get_hits(portal, '/busca').values()) == 4
+
+def test_rerun_stops_at_known_ordinances(portal, database, tmp_path):
+    state = str(tmp_path / 'crawl.db')
+    crawl(portal, state)
+    portal.hits.clear()
+    portal.total += 3
+    crawl(portal, state)
+    assert OrdinanceDAO.count() == portal.total
+    assert set(get_hits(portal, '/detail/')) == {'/detail/%d' % i for i in range(portal.total - 2, portal.total + 1)}
+    assert set(get_hits(portal, '/file/')) == {'/file/%d.pdf' % i for i in range(portal.total - 2, portal.total + 1)}
+    assert sum(get_hits(portal, '/busca').values()) == 1
+
+def test_crawl_indexes_fields(portal, database, tmp_path):
+    crawl(portal, str(tmp_path / 'crawl.db'))
+    assert list(OrdinanceDAO.iterate_unindexed(EXTRACTOR_VERSION)) == []
+    results = OrdinanceDAO.search('portaria', publisher='progep', limit=portal.total)
+    assert results and {row['publisher'] for row in results} == {'progep'}
+    assert all(row['number'] and row['date_published'] for row in results)
@@ -0,0 +1,46 @@
+import pytest
+import ordinance
+from dedup import get_fingerprint, get_overlap, get_similarity, sign_ordinances, NUMBERS_OVERLAP
+from ordinance import Ordinance, OrdinanceDAO
+
+TEMPLATE = '''MINISTÉRIO DA EDUCAÇÃO
+INSTITUTO FEDERAL DE EDUCAÇÃO, CIÊNCIA E TECNOLOGIA FLUMINENSE
+PORTARIA N.º {number} - PROGEP/IFFLU, DE 12 DE MARÇO DE 2020
+
+A PRÓ-REITORA DE GESTÃO DE PESSOAS DO INSTITUTO FEDERAL FLUMINENSE, no uso das atribuições que lhe confere o Estatuto,
+CONSIDERANDO:
+- o disposto na Lei nº 8.112, de 11 de dezembro de 1990
+- a necessidade de garantir a continuidade dos
+serviços administrativos
+RESOLVE:
+Art. 1º DESIGNAR o servidor {name}, matrícula SIAPE nº {id}, para compor a comissão
+responsável pelo acompanhamento das atividades do setor.
+Art. 2º Esta Portaria entra em vigor na data de sua publicação.
+
+MARIA SOUZA LIMA
+PRÓ-REITORA
+
+Documento assinado eletronicamente por:
+■ Maria Souza Lima, PRÓ-REITORA, em 12/03/2020 10:15:00.
+'''
+FIRST = TEMPLATE.format(number=41, name='ANA COSTA SILVA', id='1000007')
+SECOND = TEMPLATE.format(number=42, name='BRUNO LIMA ROCHA', id='1000014')
+REPUBLISHED = FIRST.replace('Documento assinado', 'PORTARIA 41/2020 - PROGEP/IFFLU | Página 1 de 2\n\nDocumento assinado')
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    path = str(tmp_path / 'database.db')
+    monkeypatch.setattr(ordinance, 'DATABASE', path)
+    yield path
+    OrdinanceDAO.close(path)
+
+def test_template_ordinances_look_alike():
+    first, second = get_fingerprint(FIRST), get_fingerprint(SECOND)
+    assert get_similarity(first[1], second[1]) >= 0.8 and get_overlap(first[0], second[0]) >= NUMBERS_OVERLAP
+
+@pytest.mark.parametrize('batch_size', [1, 100])
+def test_links_only_the_same_ordinance(database, batch_size):
+    OrdinanceDAO.insert_many([Ordinance('a.pdf', FIRST), Ordinance('b.pdf', SECOND), Ordinance('c.pdf', REPUBLISHED)])
+    duplicates = sign_ordinances(batch_size=batch_size, link=True)
+    assert [(url, canonical) for (url, canonical, _) in duplicates] == [('c.pdf', 'a.pdf')]
+    assert sorted(row['url'] for row in OrdinanceDAO.get_all()) == ['a.pdf', 'b.pdf']
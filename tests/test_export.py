@@ -0,0 +1,48 @@
+import csv, os
+import pytest
+import cli, export, ordinance, servant
+from benchmarks.corpus import CorpusGenerator
+from conftest import SERVANTS, read_rows
+from export import CsvExporter, get_exporter
+from ordinance import Ordinance, OrdinanceDAO
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    path = str(tmp_path / 'database.db')
+    monkeypatch.setattr(ordinance, 'DATABASE', path)
+    monkeypatch.setattr(servant, 'SERVANTS', SERVANTS)
+    OrdinanceDAO.insert_many([Ordinance(o['url'], o['content']) for o in CorpusGenerator(read_rows(), seed=3, noise=0).generate_many(12)])
+    yield path
+    OrdinanceDAO.close(path)
+
+def run(database, output, *options):
+    cli.main(['export', '--database', database, '--output', output, '--batch-size', '5'] + list(options))
+
+def test_format_follows_the_extension(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, 'has_pyarrow', lambda: False)
+    assert isinstance(get_exporter(str(tmp_path / 'acts.csv')), CsvExporter)
+    assert isinstance(get_exporter(str(tmp_path / 'acts.parquet'), 'csv'), CsvExporter)
+    for name in ('acts.parquet', 'acts.arrow'):
+        with pytest.raises(ImportError):
+            get_exporter(str(tmp_path / name))
+    with pytest.raises(ValueError):
+        get_exporter(str(tmp_path / 'acts'))
+
+def test_parquet_without_pyarrow_fails(database, tmp_path, monkeypatch):
+    monkeypatch.setattr(export, 'has_pyarrow', lambda: False)
+    with pytest.raises(SystemExit):
+        run(database, str(tmp_path / 'out' / 'acts.parquet'))
+    assert os.listdir(tmp_path / 'out') == []
+
+def test_csv_export(database, tmp_path):
+    run(database, str(tmp_path / 'acts.csv'))
+    with open(tmp_path / 'acts_1.csv', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert rows and {row['ordinance_id'] for row in rows}
+    assert os.path.exists(tmp_path / 'acts_dictionary.csv')
+
+def test_parquet_export(database, tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    run(database, str(tmp_path / 'acts.parquet'))
+    table = parquet.read_table(str(tmp_path / 'acts.parquet'))
+    assert table.num_rows and table.column_names == export.COLUMNS
@@ -0,0 +1,19 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from instrumentation import stats, timer
+
+def work():
+    stats.count('child')
+    with timer('child'):
+        pass
+    return stats.collect()
+
+def test_forked_workers_report_only_their_own_stats():
+    stats.collect()
+    stats.count('parent', 3)
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('fork')) as executor:
+        snapshot = executor.submit(work).result()
+    assert snapshot['counters'] == {'child': 1}
+    assert list(snapshot['timers']) == ['child']
+    stats.merge(snapshot)
+    assert stats.collect()['counters'] == {'parent': 3, 'child': 1}
@@ -0,0 +1,110 @@
+import os, re
+import pytest
+import ordinance
+from benchmarks.corpus import CorpusGenerator
+from conftest import SERVANTS, read_rows
+from ordinance import Ordinance, OrdinanceDAO
+from rdf_generator import GraphOutput, ParsedOrdinance, generate_graphs
+from servant import load_registry
+
+CHUNK_SIZE = 10
+
+HEADER = '''MINISTÉRIO DA EDUCAÇÃO
+INSTITUTO FEDERAL DE EDUCAÇÃO, CIÊNCIA E TECNOLOGIA FLUMINENSE
+PORTARIA N.º 12 - PROGEP/IFFLU, DE 12 DE MARÇO DE 2020
+
+A PRÓ-REITORA DE GESTÃO DE PESSOAS DO INSTITUTO FEDERAL FLUMINENSE, no uso das atribuições que lhe confere o Estatuto,
+RESOLVE:
+'''
+FOOTER = '''
+MARIA SOUZA LIMA
+PRÓ-REITORA
+
+Documento assinado eletronicamente por:
+■ Maria Souza Lima, PRÓ-REITORA, em 12/03/2020 10:15:00.
+'''
+
+@pytest.mark.parametrize('first, second', [
+    ('I DESIGNAR', 'II - DISPENSAR'),
+    ('I - DESIGNAR', 'II - DISPENSAR'),
+    ('1. DESIGNAR', '2. DISPENSAR'),
+    ('Art. 1º DESIGNAR', 'Art. 2º DISPENSAR'),
+])
+def test_acts_keep_text_after_the_marker(first, second):
+    content = HEADER + first + ''' o servidor ANA COSTA SILVA, nos termos da Lei Federal 8.112, de 1990;
+''' + second + ''' BRUNO LIMA ROCHA da função gratificada;
+''' + FOOTER
+    assert ParsedOrdinance(content).acts == [
+        'Designar o servidor ana costa silva, nos termos da lei federal 8.112, de 1990;',
+        'Dispensar bruno lima rocha da função gratificada;',
+    ]
+
+def test_acts_split_every_roman_item():
+    items = ['I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII', 'IX', 'X', 'XI']
+    content = HEADER + ''.join(numeral + ' - DESIGNAR o servidor %d;\n' % (index + 1) for (index, numeral) in enumerate(items)) + FOOTER
+    assert ParsedOrdinance(content).acts == ['Designar o servidor %d;' % (index + 1) for index in range(len(items))]
+
+def test_conditions_are_always_a_list():
+    content = HEADER.replace('RESOLVE:', '''CONSIDERANDO: o disposto na Lei nº 8.112, de 11 de dezembro de 1990,
+e a solicitação da chefia imediata do servidor,
+RESOLVE:''') + 'Art. 1º DESIGNAR o servidor ANA COSTA SILVA.\n' + FOOTER
+    assert ParsedOrdinance(content).conditions == [
+        'o disposto na lei nº 8.112, de 11 de dezembro de 1990, e a solicitação da chefia imediata do servidor,']
+    bullets = content.replace('CONSIDERANDO: o', 'CONSIDERANDO:\n- o').replace('\ne a', '\n- a')
+    assert ParsedOrdinance(bullets).conditions == [
+        'O disposto na lei nº 8.112, de 11 de dezembro de 1990,', 'A solicitação da chefia imediata do servidor,']
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    path = str(tmp_path / 'database.db')
+    monkeypatch.setattr(ordinance, 'DATABASE', path)
+    load_registry(SERVANTS)
+    yield path
+    OrdinanceDAO.close(path)
+
+@pytest.fixture
+def corpus():
+    return CorpusGenerator(read_rows(), seed=7, noise=0)
+
+def insert(corpus, amount, start=1):
+    OrdinanceDAO.insert_many([Ordinance(o['url'], o['content']) for o in corpus.generate_many(amount, start)])
+
+def get_urls(path):
+    with open(path) as f:
+        return set(re.findall(r'<http://schema.org/url> "([^"]+)"', f.read()))
+
+def get_shards(output):
+    return {GraphOutput.get_graph_number(path): (os.stat(path).st_mtime_ns, get_urls(path)) for path in output.get_paths()}
+
+def test_rerun_writes_rows_added_to_the_last_chunk(database, corpus, tmp_path):
+    output = GraphOutput(str(tmp_path / 'graphs'), 'ntriples')
+    insert(corpus, 25)
+    generate_graphs(output, CHUNK_SIZE, progress_interval=0)
+    before = get_shards(output)
+    insert(corpus, 10, 26)
+    generate_graphs(output, CHUNK_SIZE, progress_interval=0)
+    after = get_shards(output)
+    assert sorted(after) == [1, 2, 3, 4]
+    assert after[1] == before[1] and after[2] == before[2]
+    assert set().union(*(urls for (_, urls) in after.values())) == {o['url'] for o in OrdinanceDAO.get_all()}
+    assert len(after[3][1]) == CHUNK_SIZE and len(after[4][1]) == 5
+
+def generate(output, capsys):
+    capsys.readouterr()
+    generate_graphs(output, CHUNK_SIZE, incremental=True, progress_interval=0)
+    printed = capsys.readouterr().out
+    return sorted(map(int, re.findall(r'Graph #(\d+) saved!', printed))), sorted(map(int, re.findall(r'Graph #(\d+) removed!', printed)))
+
+def test_incremental_rewrites_only_affected_shards(database, corpus, tmp_path, capsys):
+    output = GraphOutput(str(tmp_path / 'graphs'), 'ntriples')
+    insert(corpus, 25)
+    assert generate(output, capsys) == ([1, 2, 3], [])
+    assert generate(output, capsys) == ([], [])
+    OrdinanceDAO.update_contents([Ordinance(next(corpus.generate_many(1, 15))['url'], corpus.generate(99))])
+    insert(corpus, 10, 26)
+    assert generate(output, capsys) == ([2, 3, 4], [])
+    OrdinanceDAO.delete_many(o['url'] for o in corpus.generate_many(5, 11))
+    assert generate(output, capsys) == ([2, 3], [4])
+    shards = get_shards(output)
+    assert sorted(shards) == [1, 2, 3]
+    assert set().union(*(urls for (_, urls) in shards.values())) == {o['url'] for o in OrdinanceDAO.get_all()}
@@ -0,0 +1,61 @@
+import re, unidecode
+import pytest
+from difflib import SequenceMatcher
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.issuer_matching import get_issuers
+from conftest import SERVANTS, read_rows
+from servant import ServantRegistry
+
+# Linear scans from the original rdf_generator, kept as the reference behaviour.
+
+def linear_functional_id(rows, name):
+    for row in rows:
+        if name == row['NAME']:
+            return row['ID']
+    return None
+
+def linear_position(rows, name):
+    for row in rows:
+        if name == row['NAME']:
+            return re.search(r'[\w ]+', row['POSITION']).group().strip()
+    return None
+
+def linear_references(rows, act):
+    act = unidecode.unidecode(act).lower()
+    return [row['NAME'] for row in rows if row['NAME'].lower() in act]
+
+@pytest.fixture(scope='module')
+def rows():
+    return read_rows()
+
+@pytest.fixture(scope='module')
+def registry():
+    return ServantRegistry(SERVANTS)
+
+@pytest.fixture(scope='module')
+def acts(rows):
+    generator = CorpusGenerator(rows, seed=3, noise=0)
+    return [act for ordinance in generator.generate_many(150) for act in ordinance['content'].splitlines()]
+
+def test_functional_id_and_position(rows, registry):
+    names = [row['NAME'] for row in rows] + ['', 'Nobody In Particular', rows[0]['NAME'].lower()]
+    for name in names:
+        assert registry.get_functional_id(name) == linear_functional_id(rows, name)
+        assert registry.get_position(name) == linear_position(rows, name)
+
+def test_references(rows, registry, acts):
+    acts = acts + [rows[1]['NAME'] + ' e ' + rows[2]['NAME'].upper(), 'nenhum servidor']
+    for act in acts:
+        assert registry.get_references(act) == linear_references(rows, act)
+
+def linear_match(rows, issuer):
+    for row in rows:
+        if SequenceMatcher(a=issuer.lower(), b=row['NAME'].lower()).ratio() > 0.9:
+            return row['NAME']
+    return None
+
+def test_match(rows, registry):
+    issuers = get_issuers(registry, 40, seed=5)
+    issuers += [issuer.split()[0] + ' ' + issuer.split()[-1] for issuer in issuers[:10]] + ['Reitor', 'Fulano De Tal Sicrano', 'x', '']
+    for issuer in issuers:
+        assert registry.match(issuer) == linear_match(rows, issuer)
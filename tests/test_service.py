@@ -0,0 +1,70 @@
+import json, os, threading, urllib.error, urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from benchmarks.corpus import CorpusGenerator
+from conftest import SERVANTS, read_rows
+from servant import load_registry
+from service import Batcher, ExtractionHandler, ExtractionServer
+
+def start(batcher):
+    handler = type('Handler', (ExtractionHandler,), {'batcher': batcher})
+    server = ExtractionServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:%d/' % server.server_address[1]
+
+@pytest.fixture(scope='module')
+def url():
+    load_registry(SERVANTS)
+    with ThreadPoolExecutor(2) as executor:
+        server, url = start(Batcher(executor, window=0.001))
+        yield url + 'extract'
+        server.shutdown()
+        server.server_close()
+
+def send(request):
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+def post(url, body, content_type='application/json'):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    return send(urllib.request.Request(url, data, {'Content-Type': content_type}))
+
+def test_extract(url):
+    text = CorpusGenerator(read_rows(), seed=1, noise=0).generate(10)
+    status, result = post(url, {'text': text})
+    assert status == 200
+    assert result['number'] == 11 and result['acts']
+
+@pytest.mark.parametrize('body', [{'text': ''}, {'text': '  \n'}, {'text': 'MINISTÉRIO DA EDUCAÇÃO\n'}, {'url': 'x'}, ['text']])
+def test_rejects_empty_text(url, body):
+    status, result = post(url, body)
+    assert status == 400 and result['error']
+
+@pytest.mark.parametrize('body', [b'', b'not a pdf'])
+def test_rejects_empty_pdf(url, body):
+    status, result = post(url, body, 'application/pdf')
+    assert status == 400 and result['error']
+
+def test_reports_a_broken_pool():
+    executor = ProcessPoolExecutor(1)
+    with pytest.raises(BrokenProcessPool):
+        executor.submit(os._exit, 1).result()
+    server, url = start(Batcher(executor, window=0.001))
+    try:
+        status, result = send(urllib.request.Request(url + 'health'))
+        assert status == 200 and result['status'] == 'ok'
+        for _ in range(2):
+            with pytest.raises(BrokenProcessPool):
+                server.RequestHandlerClass.batcher.submit({'text': 'x'}).result(5)
+        status, result = send(urllib.request.Request(url + 'health'))
+        assert status == 503 and result['status'] == 'error'
+        status, result = post(url + 'extract', {'text': CorpusGenerator(read_rows(), seed=1, noise=0).generate(10)})
+        assert status == 503 and result['error']
+    finally:
+        server.shutdown()
+        server.server_close()
+        executor.shutdown()
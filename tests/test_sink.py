@@ -0,0 +1,56 @@
+import gzip
+import pytest
+from rdflib import BNode, Dataset, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+from benchmarks.corpus import CorpusGenerator
+from conftest import SERVANTS, read_rows
+from rdf_generator import SCHEMA, XSD, emit_triples, get_rdf_graph
+from servant import load_registry
+from sink import BASE, TripleWriter
+
+EXTRA = [
+    (URIRef('extra'), SCHEMA.description, Literal('Com "aspas", C:\\barra\\ e\nquebra\r\nde linha', datatype=XSD.string)),
+    (URIRef('extra'), SCHEMA.name, Literal('portaria', lang='pt-br')),
+    (URIRef('extra'), SCHEMA.about, BNode('b1')),
+    (BNode('b1'), SCHEMA.name, Literal('sem tipo')),
+]
+
+@pytest.fixture(scope='module')
+def ordinances():
+    load_registry(SERVANTS)
+    return list(CorpusGenerator(read_rows(), seed=9, noise=0).generate_many(30))
+
+@pytest.fixture(scope='module')
+def expected(ordinances):
+    graph = get_rdf_graph(ordinances)
+    for triple in EXTRA:
+        graph.add(triple)
+    return Graph().parse(data=graph.serialize(format='turtle'), format='turtle', publicID=BASE)
+
+def write(ordinances, path, graph=None, compress=None):
+    with TripleWriter(path, graph, compress) as writer:
+        emit_triples(ordinances, writer)
+        for triple in EXTRA:
+            writer.add(triple)
+    return writer.count
+
+@pytest.mark.parametrize('name, compress', [('graph_1.nt', None), ('graph_1.nt.gz', True)])
+def test_ntriples_match_the_graph_sink(ordinances, expected, tmp_path, name, compress):
+    path = str(tmp_path / name)
+    count = write(ordinances, path, compress=compress)
+    with (gzip.open if compress else open)(path, 'rt', encoding='utf-8') as f:
+        graph = Graph().parse(data=f.read(), format='nt')
+    assert count == len(graph) == len(expected)
+    assert isomorphic(graph, expected)
+
+def test_nquads_match_the_graph_sink(ordinances, expected, tmp_path):
+    path = str(tmp_path / 'graph_1.nq')
+    write(ordinances, path, URIRef('graph_1'))
+    dataset = Dataset()
+    with open(path, encoding='utf-8') as f:
+        dataset.parse(data=f.read(), format='nquads')
+    assert {str(context) for (_, _, _, context) in dataset.quads()} == {BASE + 'graph_1'}
+    graph = Graph()
+    for subject, predicate, object, _ in dataset.quads():
+        graph.add((subject, predicate, object))
+    assert isomorphic(graph, expected)
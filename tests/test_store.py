@@ -0,0 +1,63 @@
+import pytest
+from rdflib import Literal
+from benchmarks.corpus import CorpusGenerator
+from conftest import SERVANTS, read_rows
+from rdf_generator import ORD, SCHEMA, XSD, get_rdf_graph
+from servant import load_registry
+from sink import BASE, TripleWriter
+from store import TripleStore
+
+SPECIAL = 'Linha com "aspas" e C:\\portarias\\\nsegunda linha\r\nterceira'
+
+def get_name(term):
+    return str(term).replace(BASE, '')
+
+@pytest.fixture(scope='module')
+def graph():
+    load_registry(SERVANTS)
+    ordinances = list(CorpusGenerator(read_rows(), seed=5, noise=0).generate_many(40))
+    ordinances[0]['content'] = ordinances[0]['content'].replace('RESOLVE:\n', 'RESOLVE:\nArt. 1º DESIGNAR "ad hoc" a pasta C:\\temp\\;\n', 1)
+    graph = get_rdf_graph(ordinances)
+    act = sorted(graph.objects(None, ORD.hasAct))[0]
+    graph.add((act, SCHEMA.description, Literal(SPECIAL, datatype=XSD.string)))
+    return graph
+
+@pytest.fixture(scope='module')
+def stores(graph, tmp_path_factory):
+    directory = tmp_path_factory.mktemp('store')
+    graph.serialize(destination=str(directory / 'graph_1.ttl'), format='turtle')
+    with TripleWriter(str(directory / 'graph_1.nt')) as writer:
+        for triple in graph:
+            writer.add(triple)
+    stores = []
+    for extension in ('ttl', 'nt'):
+        store = TripleStore(str(directory / (extension + '.db')))
+        store.load([str(directory / ('graph_1.' + extension))])
+        stores.append(store)
+    yield stores
+    for store in stores:
+        store.close()
+
+def test_formats_answer_alike(graph, stores):
+    turtle, ntriples = stores
+    names = sorted(str(name) for name in graph.objects(None, SCHEMA.name))
+    types = sorted(get_name(type) for type in set(graph.objects(None, ORD.hasType)))
+    publishers = sorted(get_name(publisher) for publisher in set(graph.objects(None, ORD.directPublisher)))
+    assert names and types and publishers
+    queries = [('acts_by_servant', (name,)) for name in names] + [('acts_by_type', (type,)) for type in types]
+    queries += [('acts_by_publisher', (publisher,)) for publisher in publishers]
+    queries += [('acts_by_publisher', (publisher, '2020-01-01', '2020-12-31')) for publisher in publishers]
+    found = set()
+    for query, arguments in queries:
+        results = getattr(turtle, query)(*arguments)
+        assert results == getattr(ntriples, query)(*arguments)
+        if results:
+            found.add((query, len(arguments)))
+    assert found == {('acts_by_servant', 1), ('acts_by_type', 1), ('acts_by_publisher', 1), ('acts_by_publisher', 3)}
+
+def test_literals_keep_escaped_characters(graph, stores):
+    types = [get_name(type) for type in set(graph.objects(None, ORD.hasType))]
+    for store in stores:
+        descriptions = {row[2] for type in types for row in store.acts_by_type(type)}
+        assert SPECIAL in descriptions
+        assert any('"ad hoc" a pasta c:\\temp\\;' in description for description in descriptions)